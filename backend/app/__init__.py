@@ -6,6 +6,8 @@ from .config import Config
 from app.routes import register_routes
 from app.models import TokenBlocklist
 from app.extensions import db, jwt, limiter, migrate
+from utils.query_stats import init_query_stats
+from utils.profiler import init_profiler
 
 jwt = JWTManager()
 
@@ -21,9 +23,11 @@ def create_app():
     CORS(app, resources=r'/*', origins="http://localhost:3000", supports_credentials=True)
 
     db.init_app(app)
+    init_query_stats(app)  # first, so its timing wraps the other request hooks
     jwt.init_app(app)
     limiter.init_app(app)
     register_routes(app)
+    init_profiler(app)
     migrate.init_app(app, db)
 
     @jwt.token_in_blocklist_loader
@@ -32,16 +36,22 @@ def create_app():
         token = db.session.query(TokenBlocklist).filter_by(jti=jti).first()
         return token is not None
 
-    with app.app_context():
-        db.create_all()
+    # Schema is managed by migrations (flask db-upgrade); create_all here would
+    # inspect every table on each worker boot. A new database is set up once with
+    # `flask create-tables`, which also stamps it so later upgrades apply (see README.md).
+    if app.config["AUTO_CREATE_TABLES"]:
+        with app.app_context():
+            db.create_all()
 
     # Ensure preflight OPTIONS requests are accepted
     @app.after_request
     def add_cors_headers(response):
         response.headers["Access-Control-Allow-Origin"] = "http://localhost:3000"
         response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.headers["Access-Control-Allow-Headers"] = "Content-Type,Authorization"
-        response.headers["Access-Control-Allow-Methods"] = "GET,POST,PUT,DELETE,OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type,Authorization,Upload-Offset,Upload-Length,X-Profile"
+        response.headers["Access-Control-Allow-Methods"] = "GET,HEAD,POST,PUT,PATCH,DELETE,OPTIONS"
+        response.headers["Access-Control-Expose-Headers"] = "Upload-Offset,Upload-Length,Location,Server-Timing,X-Profile-Id"
+        response.headers["Timing-Allow-Origin"] = "http://localhost:3000"
         return response
 
     return app
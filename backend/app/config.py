@@ -5,15 +5,74 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def engine_options(uri):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the environment. Pre-ping swaps out connections
+    that died with a Postgres restart instead of failing the request with a 500.
+    In-memory SQLite keeps the pool Flask-SQLAlchemy picks for it.
+    """
+    if not uri or uri == "sqlite://" or ":memory:" in uri:
+        return {}
+    from utils.pool_metrics import InstrumentedQueuePool
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),  # seconds to wait for a free connection
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+    if uri.startswith("postgres"):
+        # Server-side default for every statement; @statement_timeout tightens it per route
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))}",
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+        }
+    return options
+
+
 class Config:
     SECRET_KEY = os.getenv("JWT_SECRET_KEY")  # used for both Flask and JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "fallback-jwt")
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Read replica for @use_replica analytics routes (utils/replica.py); unset = everything on the primary
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {
+        "replica": {"url": DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)},
+    } if DATABASE_REPLICA_URL else {}
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"  # db/db-count/app Server-Timing header on every response
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))  # log requests slower than this...
+    SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", 30))  # ...or running this many queries
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))  # ...or repeating one statement this often
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles/")  # request profiles taken with X-Profile (utils/profiler.py)
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 200))  # oldest are deleted beyond this
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # bearer token for scraping /metrics; without it only superusers can read it
     REDIS_URL = os.getenv("REDIS_URL")
+    AUTO_CREATE_TABLES = os.getenv("AUTO_CREATE_TABLES", "false").lower() == "true"  # db.create_all() at startup; migrations own the schema otherwise
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "static/uploads/")
     FLASK_ENV = os.getenv("FLASK_ENV", "development")
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB upload cap (optional)
+    FILE_ACCEL_REDIRECT_PREFIX = os.getenv("FILE_ACCEL_REDIRECT_PREFIX")  # e.g. "/protected-uploads", an nginx internal location aliased to UPLOAD_FOLDER
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "false").lower() == "true"  # Apache/lighttpd mod_xsendfile
+    RESUMABLE_MAX_LENGTH = int(os.getenv("RESUMABLE_MAX_LENGTH", 200 * 1024 * 1024))  # total size of a chunked upload
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))  # threads validating/writing the files of one request
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))  # processes rendering thumbnails/medium variants
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true"  # off only for load tests
+    # Per-role limits for @limiter.limit(role_limit(<tier>, <default>)); roles not listed get the default
+    RATELIMIT_ROLE_TIERS = {
+        "writes": {  # students/update, meals/create, meals/record, meals/record/batch
+            "superuser": "120 per minute",
+            "admin": "120 per minute",
+            "head_tutor": "60 per minute",
+            "head_coach": "60 per minute",
+        },
+    }
+    SCHOOL_TERM_STARTS = [(1, 15), (4, 8), (7, 22)]  # (month, day) each TermEnum term starts
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)         # Auto-expire access token after 1 hour
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=1)
     JWT_TOKEN_LOCATION = ["cookies"]
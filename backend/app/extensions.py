@@ -1,18 +1,31 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_migrate import Migrate
 from utils.logging import log_rate_limit_violation
-from redis import Redis
+from utils.rate_limits import rate_limit_key
+from utils.replica import RoutingSession
+from utils.ratelimit_storage import LocalFirstRedisStorage  # registers the localfirst+redis:// scheme
 import os
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 migrate= Migrate()
+
+# Counters live in each worker and sync to Redis in batches (see utils/ratelimit_storage.py).
+# Set RATELIMIT_LOCAL_FIRST=false to hit Redis on every request instead.
+REDIS_URL = os.getenv("REDIS_URL")
+RATELIMIT_LOCAL_FIRST = os.getenv("RATELIMIT_LOCAL_FIRST", "true").lower() == "true"
+RATELIMIT_STRICT_ENDPOINTS = ["auth.login", "auth.register"]  # always counted in Redis
+
 limiter = Limiter(
-    key_func=get_remote_address,
-    storage_uri=os.getenv("REDIS_URL"),
+    key_func=rate_limit_key,
+    storage_uri=f"localfirst+{REDIS_URL}" if REDIS_URL and RATELIMIT_LOCAL_FIRST else REDIS_URL,
+    storage_options={
+        "sync_interval": float(os.getenv("RATELIMIT_SYNC_INTERVAL", 1.0)),
+        "local_fraction": float(os.getenv("RATELIMIT_LOCAL_FRACTION", 0.05)),
+        "strict_endpoints": RATELIMIT_STRICT_ENDPOINTS,
+    } if REDIS_URL and RATELIMIT_LOCAL_FIRST else {},
     default_limits=["200000 per day", "6000 per hour"],
     on_breach=log_rate_limit_violation
 )
\ No newline at end of file
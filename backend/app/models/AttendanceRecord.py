@@ -14,3 +14,23 @@ class AttendanceRecord(db.Model):
 
     student = db.relationship('Student', back_populates='attendance_records')
 
+    __table_args__ = (
+        db.Index('ix_attendance_records_school_date', 'school_id', 'date'),
+        db.Index('ix_attendance_records_student_date', 'student_id', 'date'),
+    )
+
+
+class AttendanceDailyRollup(db.Model):
+    __tablename__ = 'attendance_daily_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
+    grade = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('school_id', 'grade', 'date', 'status', name='uq_attendance_rollup_key'),
+        db.Index('ix_attendance_rollup_school_date', 'school_id', 'date'),
+    )
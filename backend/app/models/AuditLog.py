@@ -4,8 +4,28 @@ from datetime import datetime
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
 
+    # On Postgres the table is range-partitioned by month on timestamp (see
+    # utils/audit_partitions.py); the primary key there is (id, timestamp).
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     action = db.Column(db.String(255), nullable=False)
     ip_address = db.Column(db.String(100))
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    count = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # events aggregated into this row, e.g. rate-limit breaches per window
+
+    __table_args__ = (
+        db.Index('ix_audit_logs_user_timestamp', 'user_id', 'timestamp'),
+        # pattern ops so `action LIKE 'PREFIX%'` can use the index on Postgres
+        db.Index('ix_audit_logs_action_timestamp', 'action', 'timestamp',
+                 postgresql_ops={'action': 'varchar_pattern_ops'}),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "action": self.action,
+            "ip_address": self.ip_address,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "count": self.count,
+        }
@@ -27,6 +27,26 @@ class MealDistribution(db.Model):
     is_fruit = db.Column(db.Boolean, default=False)
     fruit_type = db.Column(db.String(100), nullable=True)
     fruit_other_description = db.Column(db.String(255), nullable=True)
-    photo = db.Column(db.String(255), nullable=True)
+    photo = db.Column(db.String(255), nullable=True, index=True)
 
     recorded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+
+
+db.Index('ix_meal_distributions_school_date', MealDistribution.school_id, MealDistribution.date)
+db.Index('ix_meal_distributions_student_date', MealDistribution.student_id, MealDistribution.date.desc())
+
+
+class MealDailyRollup(db.Model):
+    __tablename__ = 'meal_daily_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    meal_type = db.Column(db.String(50), nullable=False)  # Meal.type, 'unspecified' when unset
+    count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    fruit_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('school_id', 'date', 'meal_type', name='uq_meal_rollup_key'),
+    )
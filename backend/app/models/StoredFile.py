@@ -0,0 +1,12 @@
+from app.extensions import db
+from datetime import datetime
+
+class StoredFile(db.Model):
+    __tablename__ = 'stored_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    path = db.Column(db.String(255), nullable=False)  # relative to UPLOAD_FOLDER, e.g. ab/cd/<sha256>.pdf
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -2,6 +2,7 @@ from datetime import datetime
 from app.extensions import db
 from .base import SoftDeleteMixin, CategoryEnum, TermEnum
 from sqlalchemy.dialects.postgresql import JSON
+from utils.images import variant_urls
 
 class Student(db.Model, SoftDeleteMixin):
     __tablename__ = 'students'
@@ -15,8 +16,8 @@ class Student(db.Model, SoftDeleteMixin):
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
     id_number = db.Column(db.String(20), unique=True, nullable=True)
     date_of_birth = db.Column(db.Date, nullable=True)
-    photo = db.Column(db.String(255), nullable=True)
-    parent_permission_pdf = db.Column(db.String(255), nullable=True)
+    photo = db.Column(db.String(255), nullable=True, index=True)
+    parent_permission_pdf = db.Column(db.String(255), nullable=True, index=True)
 
     assessments = db.relationship('Assessment', backref='student', lazy=True, cascade="all, delete-orphan")
     academic_sessions = db.relationship('AcademicSession', back_populates='student', lazy=True, cascade="all, delete-orphan")
@@ -36,6 +37,7 @@ class Student(db.Model, SoftDeleteMixin):
             "id_number": self.id_number,
             "date_of_birth": self.date_of_birth.isoformat() if self.date_of_birth else None,
             "photo": self.photo,
+            "photo_variants": variant_urls(self.photo),
             "parent_permission_pdf": self.parent_permission_pdf,
         }
 
@@ -58,6 +60,7 @@ class Student(db.Model, SoftDeleteMixin):
                     "date": s.date.isoformat() if s.date else None,
                     "duration_hours": s.duration_hours,
                     "photo": s.photo,
+                    "photo_variants": variant_urls(s.photo),
                     "outcomes": s.outcomes,
                     "specs": s.specs,
                     "created_at": s.created_at.isoformat(),
@@ -72,6 +75,7 @@ class Student(db.Model, SoftDeleteMixin):
                     "date": s.date.isoformat() if s.date else None,
                     "duration_hours": s.duration_hours,
                     "photo": s.photo,
+                    "photo_variants": variant_urls(s.photo),
                     "outcomes": s.outcomes,
                     "specs": s.specs,
                     "created_at": s.created_at.isoformat(),
@@ -108,7 +112,7 @@ class AcademicSession(db.Model):
     session_name = db.Column(db.String(255), nullable=False)
     date = db.Column(db.Date, nullable=True)
     duration_hours = db.Column(db.Float, nullable=False)
-    photo = db.Column(db.String(255))
+    photo = db.Column(db.String(255), index=True)
     outcomes = db.Column(db.Text)
     specs = db.Column(JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -128,7 +132,7 @@ class PESession(db.Model):
     session_name = db.Column(db.String(255), nullable=False)
     date = db.Column(db.Date, nullable=False)
     duration_hours = db.Column(db.Float, nullable=False) 
-    photo = db.Column(db.String(255))
+    photo = db.Column(db.String(255), index=True)
     outcomes = db.Column(db.Text)
     specs = db.Column(JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -136,3 +140,10 @@ class PESession(db.Model):
 
     student = db.relationship("Student", back_populates="pe_sessions")
     user = db.relationship('User', back_populates='logged_pe_sessions')
+
+
+# Composite indexes matched to the hot list/detail query shapes.
+db.Index('ix_students_school_grade_live', Student.school_id, Student.grade,
+         postgresql_where=Student.deleted == False, sqlite_where=Student.deleted == False)
+db.Index('ix_academic_sessions_student_date', AcademicSession.student_id, AcademicSession.date.desc())
+db.Index('ix_pe_sessions_student_date', PESession.student_id, PESession.date.desc())
@@ -13,6 +13,6 @@ class TrainingRecord(db.Model):
     accredited = db.Column(db.Boolean, default=False)
     venue = db.Column(db.String(255), nullable=False)
     date = db.Column(db.Date, nullable=False)
-    photo = db.Column(db.String(255), nullable=True)
+    photo = db.Column(db.String(255), nullable=True, index=True)
 
     worker = db.relationship('Worker', backref='trainings')
@@ -53,3 +53,7 @@ class TokenBlocklist(db.Model):
     expires_at = db.Column(db.DateTime, nullable=False)
 
     user = db.relationship("User", backref="revoked_tokens")
+
+
+db.Index('ix_users_school_live', User.school_id, User.role_id,
+         postgresql_where=User.deleted == False, sqlite_where=User.deleted == False)
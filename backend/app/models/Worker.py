@@ -1,5 +1,6 @@
 from app.extensions import db
 from .base import SoftDeleteMixin
+from utils.images import variant_urls
 
 class Worker(db.Model, SoftDeleteMixin):
     __tablename__ = 'workers'
@@ -11,16 +12,16 @@ class Worker(db.Model, SoftDeleteMixin):
     contact_number = db.Column(db.String(20), nullable=True)
     email = db.Column(db.String(120), nullable=True)
     start_date = db.Column(db.Date, nullable=True)
-    photo = db.Column(db.String(255), nullable=True)
+    photo = db.Column(db.String(255), nullable=True, index=True)
     role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False)
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
     story = db.Column(db.Text, nullable=True)  # Their goal/motivation
     role = db.relationship('Role', back_populates='workers')
 
-    id_copy_pdf = db.Column(db.String(255), nullable=True)
-    cv_pdf = db.Column(db.String(255), nullable=True)
-    clearance_pdf = db.Column(db.String(255), nullable=True)
-    child_protection_pdf = db.Column(db.String(255), nullable=True)
+    id_copy_pdf = db.Column(db.String(255), nullable=True, index=True)
+    cv_pdf = db.Column(db.String(255), nullable=True, index=True)
+    clearance_pdf = db.Column(db.String(255), nullable=True, index=True)
+    child_protection_pdf = db.Column(db.String(255), nullable=True, index=True)
 
     def to_dict(self):
         return {
@@ -34,6 +35,7 @@ class Worker(db.Model, SoftDeleteMixin):
             "role_name": self.role.name if self.role else None,
             "start_date": self.start_date.isoformat() if self.start_date else None,
             "photo": self.photo,
+            "photo_variants": variant_urls(self.photo),
             "cv_pdf": self.cv_pdf,
             "id_copy_pdf": self.id_copy_pdf,
             "clearance_pdf": self.clearance_pdf,
@@ -41,3 +43,5 @@ class Worker(db.Model, SoftDeleteMixin):
         }
 
 
+db.Index('ix_workers_school_role_live', Worker.school_id, Worker.role_id,
+         postgresql_where=Worker.deleted == False, sqlite_where=Worker.deleted == False)
@@ -1,10 +1,11 @@
 from .User import User, Role, TokenBlocklist
 from .School import School
 from .Student import Student, Assessment, AcademicSession, PESession
-from .Meal import Meal, MealDistribution
+from .Meal import Meal, MealDistribution, MealDailyRollup
 from .Worker import Worker
 from .base import SoftDeleteMixin, CategoryEnum, TermEnum
 from .AuditLog import AuditLog
-from .AttendanceRecord import AttendanceRecord
+from .AttendanceRecord import AttendanceRecord, AttendanceDailyRollup
 from .TrainingRecord import TrainingRecord
 from .UserRemoval import UserRemovalReview
+from .StoredFile import StoredFile
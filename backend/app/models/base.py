@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
 from app.extensions import db
 import enum
 
@@ -14,6 +16,28 @@ class SoftDeleteMixin:
         self.deleted = False
         self.deleted_at = None
 
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_soft_deleted(execute_state):
+    """
+    Adds `deleted = false` to every ORM SELECT (including joins and the lazy loads
+    they trigger) for models using SoftDeleteMixin.
+    Opt out per query with .execution_options(include_deleted=True).
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                SoftDeleteMixin,
+                lambda cls: cls.deleted == False,
+                include_aliases=True,
+            )
+        )
+
 class CategoryEnum(enum.Enum):
     pr = "pr"
     ww = "ww"
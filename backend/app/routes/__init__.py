@@ -1,22 +1,29 @@
-from .auth import auth_bp
-from .uploads import upload_bp
-from .workers import workers_bp
-from .students import students_bp
-from .assessments import assessments_bp
-from .student_sessions import student_sessions_bp
-from .meals import meals_bp
-from .meals_stats import meal_stats_bp
-from .worker_trainings import worker_trainings_bp
-from .base_route import base_bp 
-from .dashboard import dashboard_bp
-from .student_sessions import student_sessions_bp
-from .schools import schools_bp
-
 def register_routes(app):
+    # Imported here rather than at module level so that importing app.routes
+    # (and app) stays cheap until an app is actually built
+    from .auth import auth_bp
+    from .uploads import upload_bp
+    from .workers import workers_bp
+    from .students import students_bp
+    from .assessments import assessments_bp
+    from .student_sessions import student_sessions_bp
+    from .meals import meals_bp
+    from .meals_stats import meal_stats_bp
+    from .worker_trainings import worker_trainings_bp
+    from .base_route import base_bp
+    from .dashboard import dashboard_bp
+    from .schools import schools_bp
+    from .timeseries import timeseries_bp
+    from .resumable_uploads import resumable_bp
+    from .audit import audit_bp
+    from .metrics import metrics_bp
+    from .profiles import profiles_bp
+
     app.register_blueprint(base_bp)
     app.register_blueprint(dashboard_bp, url_prefix="/dashboard") #works
     app.register_blueprint(auth_bp, url_prefix='/auth') # works
     app.register_blueprint(upload_bp, url_prefix='/upload')  # now handles worker uploads too
+    app.register_blueprint(resumable_bp, url_prefix='/upload/resumable')
     app.register_blueprint(workers_bp, url_prefix='/workers') # works
     app.register_blueprint(students_bp, url_prefix='/students')
     app.register_blueprint(assessments_bp, url_prefix='/assessments')
@@ -25,4 +32,8 @@ def register_routes(app):
     app.register_blueprint(meal_stats_bp, url_prefix='/mealstats')
     app.register_blueprint(worker_trainings_bp, url_prefix="/trainings")
     app.register_blueprint(schools_bp, url_prefix="/schools") 
+    app.register_blueprint(timeseries_bp, url_prefix="/timeseries")
+    app.register_blueprint(audit_bp, url_prefix="/audit")
+    app.register_blueprint(metrics_bp, url_prefix="/metrics")
+    app.register_blueprint(profiles_bp, url_prefix="/profiles")
 
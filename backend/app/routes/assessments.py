@@ -7,6 +7,7 @@ from app.extensions import db
 from flask_cors import cross_origin
 from utils.maintenance import maintenance_guard
 from utils.formSchema import generate_schema_from_model
+from utils.replica import use_replica
 
 assessments_bp = Blueprint('assessments', __name__)
 
@@ -138,6 +139,7 @@ def build_filters(filters, user):
 # @maintenance_guard()
 @jwt_required()
 @role_required('head_tutor', 'head_coach', 'admin', 'superuser')
+@use_replica
 def get_averages():
     user = User.query.get(get_jwt_identity())
 
@@ -0,0 +1,73 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from flask_cors import cross_origin
+from datetime import datetime, timedelta, timezone
+from app.models import AuditLog
+from utils.decorators import role_required
+
+audit_bp = Blueprint('audit', __name__)
+
+DEFAULT_RANGE_DAYS = 30
+MAX_PER_PAGE = 200
+
+
+def _parse_datetime(value):
+    """
+    Accepts YYYY-MM-DD or an ISO timestamp. Returns naive UTC, like the stored
+    timestamps; a timestamp with an offset is converted, one without is taken as UTC.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@audit_bp.route('/logs', methods=['GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+@role_required('superuser')
+def list_audit_logs():
+    """
+    Paginated audit trail, newest first.
+
+    Query params:
+        user_id: only this user's events
+        action: action prefix, e.g. RATE_LIMIT_EXCEEDED or LOGIN
+        start, end: time range (YYYY-MM-DD or ISO timestamp); defaults to the
+            last 30 days so Postgres only scans the matching monthly partitions
+        page, per_page
+    """
+    try:
+        end = _parse_datetime(request.args.get('end')) or datetime.utcnow()
+        start = _parse_datetime(request.args.get('start')) or end - timedelta(days=DEFAULT_RANGE_DAYS)
+    except ValueError:
+        return jsonify({"error": "Invalid start/end. Use YYYY-MM-DD or an ISO timestamp"}), 400
+    if start > end:
+        return jsonify({"error": "start must be before end"}), 400
+
+    query = AuditLog.query.filter(AuditLog.timestamp >= start, AuditLog.timestamp <= end)
+
+    user_id = request.args.get('user_id', type=int)
+    if user_id:
+        query = query.filter(AuditLog.user_id == user_id)
+
+    action = request.args.get('action')
+    if action:
+        query = query.filter(AuditLog.action.startswith(action, autoescape=True))
+
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 50, type=int), MAX_PER_PAGE)
+    paginated = query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+
+    return jsonify({
+        "logs": [log.to_dict() for log in paginated.items],
+        "total": paginated.total,
+        "page": paginated.page,
+        "pages": paginated.pages,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+    }), 200
@@ -29,7 +29,7 @@ def register():
     if not username or not password or not role_name:
         return jsonify({"error": "Username, password, and role are required"}), 400
 
-    if User.query.filter_by(username=username).first():
+    if User.query.execution_options(include_deleted=True).filter_by(username=username).first():
         return jsonify({"error": "Username already exists"}), 400
 
     role = Role.query.filter_by(name=role_name).first()
@@ -79,7 +79,11 @@ def login():
         access_token = create_access_token(
             identity=str(user.id),
             expires_delta=timedelta(hours=1),
-            additional_claims={"role_id": user.role_id, "school_id": user.school_id}
+            additional_claims={
+                "role_id": user.role_id,
+                "role": user.role.name if user.role else None,
+                "school_id": user.school_id,
+            }
         )
         refresh_token = create_refresh_token(
             identity=str(user.id),
@@ -148,7 +152,11 @@ def refresh_access_token():
     access_token = create_access_token(
         identity=str(user.id),
         expires_delta=timedelta(hours=1),
-        additional_claims={"role_id": user.role_id, "school_id": user.school_id}
+        additional_claims={
+            "role_id": user.role_id,
+            "role": user.role.name if user.role else None,
+            "school_id": user.school_id,
+        }
     )
 
     response = make_response(jsonify({"message": "Token refreshed"}))
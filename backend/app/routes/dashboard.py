@@ -3,11 +3,15 @@ from sqlalchemy import func
 from app.models import School, Student, Worker, Role, MealDistribution
 from app.extensions import db
 from utils.maintenance import maintenance_guard
+from utils.statement_timeout import statement_timeout
+from utils.replica import use_replica
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/summary')
 # @maintenance_guard()
+@statement_timeout(10000)
+@use_replica
 def summary():
     site_ids = request.args.get('site_id')
 
@@ -1,27 +1,39 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import Meal, MealDistribution, Student, User, School
 from app.extensions import db, jwt, limiter
-from utils.decorators import role_required, session_role_required
-import os
-from werkzeug.utils import secure_filename
+from utils.decorators import role_required, session_role_required, session_role_error
+import json
 from datetime import datetime
 from flask_cors import cross_origin
 from utils.formSchema import generate_schema_from_model
 from utils.maintenance import maintenance_guard
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from utils.access_control import get_allowed_site_ids
+from utils.rollups import add_meal_distributions
+from utils.storage import store_upload, retain
+from utils.rate_limits import role_limit
 meals_bp = Blueprint('meals', __name__)
 
-UPLOAD_FOLDER = 'uploads/meal_photos'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+MAX_BATCH_SIZE = 500
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def parse_quantity(value):
+    """A positive whole number from JSON or form input, else None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value > 0 else None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value) or None
+    return None
+
 @meals_bp.route('/create', methods=['POST'])
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
-@limiter.limit("10 per minute")
+@limiter.limit(role_limit("writes", "10 per minute"))
 # @maintenance_guard()
 @jwt_required()
 @session_role_required()
@@ -98,9 +110,11 @@ def list_meals():
         }
         for name, meal_type, ingredients, count in results
     ])
-@limiter.limit("10 per minute")
+
+
 @meals_bp.route('/record', methods=['POST'])
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@limiter.limit(role_limit("writes", "10 per minute"))
 # @maintenance_guard()
 @jwt_required()
 @session_role_required()
@@ -122,21 +136,15 @@ def record_meal():
 
         date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else datetime.utcnow().date()
 
-        file = request.files.get('photo')
-        photo_filename = None
-
-        if file and allowed_file(file.filename):
-            photo_filename = secure_filename(file.filename)
-            upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], UPLOAD_FOLDER)
-            os.makedirs(upload_path, exist_ok=True)
-            file.save(os.path.join(upload_path, photo_filename))
-
         if not all([user, student, meal]):
             return jsonify({"error": "Invalid or missing student, meal, or user"}), 400
 
         if student.school_id != user.school_id:
             return jsonify({"error": "Access forbidden: school mismatch"}), 403
 
+        file = request.files.get('photo')
+        photo_filename = store_upload(file) if file and allowed_file(file.filename) else None
+
         distribution = MealDistribution(
             date=date,
             student_id=student_id,
@@ -150,6 +158,12 @@ def record_meal():
             photo=photo_filename
         )
         db.session.add(distribution)
+        add_meal_distributions([{
+            "school_id": student.school_id,
+            "date": date,
+            "quantity": quantity,
+            "is_fruit": is_fruit,
+        }], meal.type)
         db.session.commit()
         return jsonify({
             "message": "Meal distribution recorded",
@@ -159,4 +173,127 @@ def record_meal():
     except ValueError as ve:
         return jsonify({"error": "Invalid input types", "details": str(ve)}), 400
     except Exception as e:
-        return jsonify({"error": "Server error", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Server error", "details": str(e)}), 500
+
+
+@meals_bp.route('/record/batch', methods=['POST'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@limiter.limit(role_limit("writes", "10 per minute"))
+# @maintenance_guard()
+@jwt_required()
+@role_required('admin', 'superuser', 'head_coach', 'head_tutor')
+def record_meal_batch():
+    """
+    Records one meal on one date for a whole class in a single request.
+    Accepts JSON, or multipart form data (with `students` as a JSON string) plus an optional shared photo:
+        meal_id, date (YYYY-MM-DD, defaults to today),
+        students: [student_id, ...] or [{"student_id", "quantity", "is_fruit", "fruit_type", "fruit_other_description"}, ...]
+    Each student gets the school and role checks /record applies (session_role_required).
+    The rate limit counts batches, not students.
+    """
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        entries = data.get('students') or []
+    else:
+        data = request.form
+        try:
+            entries = json.loads(data.get('students') or '[]')
+        except ValueError:
+            return jsonify({"error": "students must be a JSON list"}), 400
+
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "At least one student is required"}), 400
+    if len(entries) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"A batch can hold at most {MAX_BATCH_SIZE} students"}), 400
+
+    try:
+        meal_id = int(data.get('meal_id'))
+        date_str = data.get('date')
+        date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else datetime.utcnow().date()
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid or missing meal_id or date"}), 400
+
+    meal = Meal.query.get(meal_id)
+    if not meal:
+        return jsonify({"error": "Meal not found"}), 404
+
+    # Normalise entries, keeping the first one for each student
+    wanted = {}
+    results = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            entry = {"student_id": entry}
+        quantity = parse_quantity(entry.get('quantity', 1))
+        if quantity is None:
+            return jsonify({
+                "error": f"Invalid quantity for student entry {index}: must be a whole number above 0"
+            }), 400
+        try:
+            student_id = int(entry.get('student_id'))
+        except (TypeError, ValueError):
+            results.append({"student_id": entry.get('student_id'), "status": "invalid"})
+            continue
+        if student_id in wanted:
+            results.append({"student_id": student_id, "status": "duplicate"})
+            continue
+        wanted[student_id] = {
+            "quantity": quantity,
+            "is_fruit": str(entry.get('is_fruit', 'false')).lower() in ['true', '1', 'yes'],
+            "fruit_type": entry.get('fruit_type') or None,
+            "fruit_other_description": entry.get('fruit_other_description') or None,
+        }
+
+    allowed_site_ids = get_allowed_site_ids(user)
+    students = {
+        s.id: s for s in Student.query.filter(Student.id.in_(wanted.keys())).all()
+    } if wanted else {}
+
+    rows = []
+    for student_id, fields in wanted.items():
+        student = students.get(student_id)
+        if not student:
+            results.append({"student_id": student_id, "status": "not_found"})
+        elif student.school_id not in allowed_site_ids:
+            results.append({"student_id": student_id, "status": "forbidden"})
+        elif session_role_error(user, student):
+            # Same check as session_role_required on /record, per student
+            results.append({"student_id": student_id, "status": "forbidden"})
+        else:
+            rows.append({
+                "date": date,
+                "student_id": student_id,
+                "school_id": student.school_id,
+                "meal_id": meal.id,
+                "recorded_by": user.id,
+                **fields,
+            })
+
+    if not rows:
+        return jsonify({"message": "No meal distributions recorded", "results": results}), 400
+
+    file = request.files.get('photo')
+    photo_filename = store_upload(file) if file and allowed_file(file.filename) else None
+    if photo_filename:
+        # Every row holds the shared photo, so each needs its own reference
+        retain(photo_filename, len(rows) - 1)
+    for row in rows:
+        row["photo"] = photo_filename
+
+    inserted = db.session.execute(
+        insert(MealDistribution).values(rows).returning(MealDistribution.id, MealDistribution.student_id)
+    ).all()
+    add_meal_distributions(rows, meal.type)
+    db.session.commit()
+
+    results.extend(
+        {"student_id": student_id, "status": "created", "distribution_id": distribution_id}
+        for distribution_id, student_id in inserted
+    )
+    return jsonify({
+        "message": f"{len(inserted)} meal distributions recorded",
+        "results": results
+    }), 201
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Meal, Student, User, MealDistribution
+from app.models import Meal, Student, User, MealDistribution, MealDailyRollup
 from app.extensions import db
 from sqlalchemy import func
 from datetime import datetime
@@ -9,6 +9,10 @@ from utils.access_control import get_allowed_site_ids
 from flask_cors import cross_origin
 from utils.maintenance import maintenance_guard
 from utils.formSchema import generate_schema_from_model
+from utils.rollups import UNSPECIFIED_MEAL_TYPE
+from utils.images import variant_urls
+from utils.statement_timeout import statement_timeout
+from utils.replica import use_replica
 
 meal_stats_bp = Blueprint('mealstats', __name__)
 
@@ -39,6 +43,7 @@ def form_schema():
 # @maintenance_guard()
 @jwt_required()
 @role_required('head_tutor', 'head_coach', 'admin', 'superuser')
+@use_replica
 def daily_stats():
     user = User.query.get(get_jwt_identity())
     if not user:
@@ -63,14 +68,14 @@ def daily_stats():
 
     # Filter by allowed school_ids
     stats = db.session.query(
-        Meal.type.label("meal_type"),
-        func.count(MealDistribution.id).label("count")
-    ).join(Student).filter(
-        Student.school_id.in_(allowed_site_ids),
-        MealDistribution.date == date_obj
-    ).group_by(Meal.type).all()
-
-    result = {row.meal_type or "unspecified": row.count for row in stats}
+        MealDailyRollup.meal_type,
+        func.sum(MealDailyRollup.count).label("count")
+    ).filter(
+        MealDailyRollup.school_id.in_(allowed_site_ids),
+        MealDailyRollup.date == date_obj
+    ).group_by(MealDailyRollup.meal_type).all()
+
+    result = {row.meal_type: row.count for row in stats}
     return jsonify(result), 200
 
 @meal_stats_bp.route('/monthly', methods=['GET'])
@@ -78,6 +83,8 @@ def daily_stats():
 # @maintenance_guard()
 @jwt_required()
 @role_required('head_tutor', 'head_coach', 'admin', 'superuser')
+@statement_timeout(10000)
+@use_replica
 def monthly_stats():
     user = User.query.get(get_jwt_identity())
     if not user:
@@ -109,14 +116,14 @@ def monthly_stats():
 
     # Query stats across all allowed sites
     stats = db.session.query(
-        MealDistribution.date,
-        Meal.type.label("meal_type"),
-        func.count(MealDistribution.id).label("count")
-    ).join(Meal).join(Student).filter(
-        Student.school_id.in_(allowed_site_ids),
-        MealDistribution.date >= start_date,
-        MealDistribution.date < end_date
-    ).group_by(MealDistribution.date, Meal.type).order_by(MealDistribution.date).all()
+        MealDailyRollup.date,
+        MealDailyRollup.meal_type,
+        func.sum(MealDailyRollup.count).label("count")
+    ).filter(
+        MealDailyRollup.school_id.in_(allowed_site_ids),
+        MealDailyRollup.date >= start_date,
+        MealDailyRollup.date < end_date
+    ).group_by(MealDailyRollup.date, MealDailyRollup.meal_type).order_by(MealDailyRollup.date).all()
 
     # Group results by date → meal_type → count
     result = {}
@@ -124,7 +131,7 @@ def monthly_stats():
         date = row.date.isoformat()
         if date not in result:
             result[date] = {}
-        result[date][row.meal_type or "unspecified"] = row.count
+        result[date][row.meal_type] = row.count
 
     return jsonify(result), 200
 
@@ -132,6 +139,7 @@ def monthly_stats():
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
 # @maintenance_guard()
 @jwt_required()
+@use_replica
 def student_meal_stats(student_id):
     student = Student.query.get_or_404(student_id)
 
@@ -145,7 +153,8 @@ def student_meal_stats(student_id):
         {
             "date": row.date.isoformat(),
             "meal_type": row.meal_type,
-            "photo": row.photo
+            "photo": row.photo,
+            "photo_variants": variant_urls(row.photo)
         } for row in meal_distributions
     ]), 200
 
@@ -153,34 +162,44 @@ def student_meal_stats(student_id):
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
 # @maintenance_guard()
 @jwt_required()
+@use_replica
 def school_meal_aggregate(school_id):
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    try:
+        get_allowed_site_ids(user, [school_id])
+    except (ValueError, PermissionError) as e:
+        return jsonify({"error": str(e)}), 403
+
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
     query = db.session.query(
-        func.count(MealDistribution.id).label('meals_given'),
-        func.sum(MealDistribution.sandwiches).label('sandwiches_given'),
-        func.sum(func.cast(MealDistribution.fruit, db.Integer)).label('fruit_given')
-    ).join(Student).filter(Student.school_id == school_id)
+        func.sum(MealDailyRollup.count).label('meals_given'),
+        func.sum(MealDailyRollup.quantity).label('quantity_given'),
+        func.sum(MealDailyRollup.fruit_count).label('fruit_given')
+    ).filter(MealDailyRollup.school_id == school_id)
 
     if start_date:
         try:
             start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(MealDistribution.date >= start)
+            query = query.filter(MealDailyRollup.date >= start)
         except ValueError:
             return jsonify({"error": "Invalid start_date"}), 400
 
     if end_date:
         try:
             end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(MealDistribution.date <= end)
+            query = query.filter(MealDailyRollup.date <= end)
         except ValueError:
             return jsonify({"error": "Invalid end_date"}), 400
 
     result = query.first()
     return jsonify({
         "meals_given": result.meals_given or 0,
-        "sandwiches_given": result.sandwiches_given or 0,
+        "quantity_given": result.quantity_given or 0,
         "fruit_given": result.fruit_given or 0
     }), 200
 
@@ -190,6 +209,7 @@ def school_meal_aggregate(school_id):
 # @maintenance_guard()
 @jwt_required()
 @role_required('head_tutor', 'head_coach', 'admin', 'superuser')
+@use_replica
 def type_breakdown():
     user = User.query.get(get_jwt_identity())
     if not user:
@@ -207,30 +227,40 @@ def type_breakdown():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
-    query = db.session.query(
-        Meal.type.label('meal_type'),
-        func.count(MealDistribution.id).label('count')
-    ).join(Meal).join(Student)
-
-    # Filter by allowed schools
-    query = query.filter(Student.school_id.in_(allowed_site_ids))
-
+    # The rollup has no per-student breakdown, so single-student requests read
+    # that student's (indexed) distributions directly.
     if student_id:
-        query = query.filter(Student.id == student_id)
+        meal_type = func.coalesce(Meal.type, UNSPECIFIED_MEAL_TYPE)
+        query = db.session.query(
+            meal_type.label('meal_type'),
+            func.count(MealDistribution.id).label('count')
+        ).join(Meal).filter(
+            MealDistribution.school_id.in_(allowed_site_ids),
+            MealDistribution.student_id == student_id
+        ).group_by(meal_type)
+        date_column = MealDistribution.date
+    else:
+        query = db.session.query(
+            MealDailyRollup.meal_type,
+            func.sum(MealDailyRollup.count).label('count')
+        ).filter(
+            MealDailyRollup.school_id.in_(allowed_site_ids)
+        ).group_by(MealDailyRollup.meal_type)
+        date_column = MealDailyRollup.date
 
     if start_date:
         try:
-            query = query.filter(MealDistribution.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+            query = query.filter(date_column >= datetime.strptime(start_date, '%Y-%m-%d').date())
         except ValueError:
             return jsonify({"error": "Invalid start_date"}), 400
 
     if end_date:
         try:
-            query = query.filter(MealDistribution.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+            query = query.filter(date_column <= datetime.strptime(end_date, '%Y-%m-%d').date())
         except ValueError:
             return jsonify({"error": "Invalid end_date"}), 400
 
-    results = query.group_by(Meal.type).all()
+    results = query.all()
 
-    breakdown = {row.meal_type or "unspecified": row.count for row in results}
+    breakdown = {row.meal_type: row.count for row in results}
     return jsonify(breakdown), 200
@@ -0,0 +1,36 @@
+import hmac
+from flask import Blueprint, request, jsonify, current_app, Response
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from app.extensions import db
+from app.models import User
+from utils.pool_metrics import prometheus_text
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _authorized():
+    """Bearer METRICS_TOKEN (for the scraper) or a signed-in superuser."""
+    token = current_app.config.get("METRICS_TOKEN")
+    header = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(header, f"Bearer {token}"):
+        return True
+
+    verify_jwt_in_request(optional=True)
+    user_id = get_jwt_identity()
+    user = User.query.get(user_id) if user_id else None
+    return bool(user and user.role and user.role.name == "superuser")
+
+
+@metrics_bp.route('/', methods=['GET'])
+def metrics():
+    """
+    Connection pool telemetry in Prometheus text format: checkout wait time,
+    overflow use, timeouts, connection age and reconnects per bind. Each gunicorn
+    worker has its own pool, so samples carry a pid label; scrape every worker
+    (or sum by bind) to size DB_POOL_SIZE / DB_MAX_OVERFLOW.
+    """
+    if not _authorized():
+        return jsonify({"error": "Access forbidden: insufficient permissions"}), 403
+
+    engines = {bind or "default": engine for bind, engine in db.engines.items()}
+    return Response(prometheus_text(engines), mimetype="text/plain; version=0.0.4")
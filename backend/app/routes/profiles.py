@@ -0,0 +1,38 @@
+from flask import Blueprint, jsonify, current_app, send_from_directory, abort
+from flask_jwt_extended import jwt_required
+from flask_cors import cross_origin
+from datetime import datetime
+from utils.decorators import role_required
+from utils.profiler import list_profiles, profile_dir
+
+profiles_bp = Blueprint('profiles', __name__)
+
+
+@profiles_bp.route('/', methods=['GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+@role_required('superuser')
+def list_request_profiles():
+    """
+    Profiles recorded with the X-Profile header, newest first. .prof files are
+    pstats (python -m pstats, snakeviz); .speedscope.json opens in speedscope.app.
+    """
+    return jsonify([
+        {
+            "name": entry.name,
+            "size": entry.stat().st_size,
+            "created_at": datetime.utcfromtimestamp(entry.stat().st_mtime).isoformat(),
+            "url": f"/profiles/{entry.name}",
+        }
+        for entry in list_profiles(current_app)
+    ]), 200
+
+
+@profiles_bp.route('/<name>', methods=['GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+@role_required('superuser')
+def download_request_profile(name):
+    if name not in {entry.name for entry in list_profiles(current_app)}:
+        abort(404)
+    return send_from_directory(profile_dir(current_app), name, as_attachment=True)
@@ -0,0 +1,130 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_cors import cross_origin
+from werkzeug.utils import secure_filename
+from utils.resumable import (
+    UploadError, OffsetMismatch, UploadLocked,
+    create_upload, get_upload, append_chunk, read_header, finalize_upload, discard_upload,
+)
+from .uploads import allowed_extension, allowed_header
+
+resumable_bp = Blueprint('resumable_uploads', __name__)
+
+CHUNK_CONTENT_TYPES = {'application/offset+octet-stream', 'application/octet-stream'}
+
+# Loosely follows the tus.io core protocol:
+#   POST   /upload/resumable                {filename, length}  -> 201 upload_id
+#   PATCH  /upload/resumable/<id>           Upload-Offset + raw bytes -> 204, new Upload-Offset
+#   HEAD   /upload/resumable/<id>           -> Upload-Offset / Upload-Length (resume point)
+#   POST   /upload/resumable/<id>/finalize  -> type check + store; the id can then be sent as
+#                                              `<field>_upload_id` to the file endpoints
+
+
+def _offset_headers(meta):
+    return {
+        "Upload-Offset": str(meta.get("offset", meta["length"])),
+        "Upload-Length": str(meta["length"]),
+        "Cache-Control": "no-store",
+    }
+
+
+@resumable_bp.route('', methods=['POST'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+def create_resumable_upload():
+    data = request.get_json(silent=True) or request.form
+    filename = secure_filename(data.get('filename') or '')
+    try:
+        length = int(data.get('length'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "length must be an integer"}), 400
+
+    if not filename or not allowed_extension(filename):
+        return jsonify({"error": "File type not allowed"}), 400
+
+    max_length = current_app.config['RESUMABLE_MAX_LENGTH']
+    if length <= 0 or length > max_length:
+        return jsonify({"error": f"length must be between 1 and {max_length} bytes"}), 400
+
+    upload_id = create_upload(get_jwt_identity(), filename, length)
+    return jsonify({"upload_id": upload_id, "offset": 0, "length": length}), 201, {
+        "Location": f"{request.path.rstrip('/')}/{upload_id}"
+    }
+
+
+@resumable_bp.route('/<upload_id>', methods=['HEAD', 'GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True, expose_headers=["Upload-Offset", "Upload-Length"])
+@jwt_required()
+def resumable_upload_status(upload_id):
+    try:
+        meta = get_upload(upload_id, get_jwt_identity())
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 404
+
+    return jsonify({
+        "upload_id": upload_id,
+        "filename": meta["filename"],
+        "offset": meta.get("offset", meta["length"]),
+        "length": meta["length"],
+        "completed": meta["completed"],
+    }), 200, _offset_headers(meta)
+
+
+@resumable_bp.route('/<upload_id>', methods=['PATCH'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True, expose_headers=["Upload-Offset", "Upload-Length"])
+@jwt_required()
+def append_resumable_upload(upload_id):
+    if request.mimetype not in CHUNK_CONTENT_TYPES:
+        return jsonify({"error": "Content-Type must be application/offset+octet-stream"}), 415
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+
+    user_id = get_jwt_identity()
+    try:
+        new_offset = append_chunk(upload_id, user_id, offset, request.stream)
+    except OffsetMismatch as e:
+        return jsonify({"error": str(e)}), 409
+    except UploadLocked as e:
+        return jsonify({"error": str(e)}), 423
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return "", 204, _offset_headers(get_upload(upload_id, user_id)) | {"Upload-Offset": str(new_offset)}
+
+
+@resumable_bp.route('/<upload_id>/finalize', methods=['POST'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+def finalize_resumable_upload(upload_id):
+    user_id = get_jwt_identity()
+    try:
+        meta = get_upload(upload_id, user_id)
+        if not meta["completed"] and meta["offset"] == meta["length"]:
+            if not allowed_header(read_header(upload_id)):
+                discard_upload(upload_id, user_id)
+                return jsonify({"error": "File content does not match an allowed type"}), 400
+        meta = finalize_upload(upload_id, user_id)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "upload_id": upload_id,
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "completed": True,
+    }), 200
+
+
+@resumable_bp.route('/<upload_id>', methods=['DELETE'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+def delete_resumable_upload(upload_id):
+    try:
+        discard_upload(upload_id, get_jwt_identity())
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 404
+
+    return jsonify({"message": "Upload discarded"}), 200
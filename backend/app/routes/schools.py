@@ -3,12 +3,14 @@ from flask_jwt_extended import jwt_required
 from utils.decorators import role_required, session_role_required
 from app.models import School, Student, Worker, MealDistribution, User, AcademicSession, PESession
 from app.extensions import db
+from utils.replica import use_replica
 
 schools_bp = Blueprint('schools', __name__)
 
 @schools_bp.route('/summary', methods=['GET'])
 @jwt_required()
 @role_required('admin', 'superuser', 'head_tutor', 'head_coach')
+@use_replica
 def schools_summary():
     school_ids = request.args.getlist('school_id')
     include_details = request.args.get('include_details', 'false').lower() == 'true'
@@ -1,17 +1,18 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import Student, User, AcademicSession, CategoryEnum, Assessment, PESession
 from utils.decorators import role_required, session_role_required, get_allowed_site_ids, school_access_required
-from werkzeug.utils import secure_filename
 from datetime import datetime
-import os
 from io import BytesIO
-import zipfile, pandas as pd
+import zipfile
 from app.extensions import db
 from flask_cors import cross_origin
 from utils.formSchema import generate_schema_from_model
 from utils.maintenance import maintenance_guard
 from utils.specs_config import SPEC_OPTIONS
+from utils.storage import store_bytes
+from utils.images import variant_urls
+from utils.replica import use_replica
 from collections import defaultdict
 import statistics
 import json
@@ -313,6 +314,7 @@ def list_sessions():
             "specs": s.specs,
             "outcomes": s.outcomes,
             "photo": s.photo,
+            "photo_variants": variant_urls(s.photo),
         })
 
     return jsonify({
@@ -402,6 +404,7 @@ def all_students_stats():
 
 @student_sessions_bp.route('/specs/summary', methods=['GET'])
 @jwt_required()
+@use_replica
 def get_specs_summary():
     user = User.query.get(get_jwt_identity())
     if not user:
@@ -512,6 +515,9 @@ def bulk_upload_sessions():
     if not student_map:
         return jsonify({"error": "No students matched the filters"}), 400
 
+    # pandas (and numpy) take ~0.4 s to import; only this endpoint needs them
+    import pandas as pd
+
     ext = file.filename.rsplit('.', 1)[1].lower()
     try:
         if ext == 'csv':
@@ -549,12 +555,7 @@ def bulk_upload_sessions():
         photo_filename = row.get('photo_filename')
         saved_photo = None
         if photo_filename and photo_filename in photo_files:
-            secure_name = secure_filename(photo_filename)
-            photo_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'session_photos')
-            os.makedirs(photo_path, exist_ok=True)
-            with open(os.path.join(photo_path, secure_name), 'wb') as f:
-                f.write(photo_files[photo_filename])
-            saved_photo = secure_name
+            saved_photo = store_bytes(photo_files[photo_filename], photo_filename)
 
         student = student_map[student_id]
         session = AcademicSession(
@@ -1,15 +1,19 @@
 from datetime import datetime
+from collections import Counter
 from app.extensions import db, jwt, limiter
-from app.models import Student, User, CategoryEnum, AttendanceRecord, AcademicSession, PESession,Assessment
+from app.models import Student, User, CategoryEnum, AttendanceRecord, AttendanceDailyRollup, AcademicSession, PESession,Assessment
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import func, inspect
 from utils.decorators import role_required, session_role_required
 from utils.pagination import apply_pagination_and_search
 from utils.access_control import get_allowed_site_ids
+from utils.rollups import apply_attendance_deltas, apply_student_attendance, apply_student_meals
 from flask_cors import cross_origin, CORS
 from utils.formSchema import generate_schema_from_model
 from utils.maintenance import maintenance_guard
+from utils.rate_limits import role_limit
+from utils.statement_timeout import statement_timeout
 from werkzeug.datastructures import FileStorage
 
 students_bp = Blueprint("students", __name__)
@@ -172,7 +176,7 @@ def create_student():
 
     # Check for duplicate id_number if provided
     id_number = student_data.get("id_number")
-    if id_number and Student.query.filter_by(id_number=id_number).first():
+    if id_number and Student.query.execution_options(include_deleted=True).filter_by(id_number=id_number).first():
         return jsonify({"error": "Student with this id_number already exists"}), 400
 
     # Check school access permission
@@ -191,9 +195,9 @@ def create_student():
     }), 201
 
 
-@limiter.limit("10 per minute")
 @students_bp.route('/update/<int:student_id>', methods=['PUT'])
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@limiter.limit(role_limit("writes", "10 per minute"))
 # @maintenance_guard()
 @jwt_required()
 @role_required('head_tutor', 'head_coach', 'admin', 'superuser')
@@ -216,7 +220,12 @@ def update_student(student_id):
     if 'surname' in data:
         student.surname = data.get('surname').strip()
     if 'grade' in data:
-        student.grade = data.get('grade')
+        grade = data.get('grade')
+        if grade != student.grade:
+            # The attendance rollup is keyed on the current grade; move this student's counts along
+            apply_student_attendance(student.id, -1, grade=student.grade)
+            apply_student_attendance(student.id, 1, grade=grade)
+        student.grade = grade
     if 'category' in data:
         try:
             student.category = CategoryEnum(data.get('category'))
@@ -249,25 +258,53 @@ def mark_attendance():
         return jsonify({"error": "Missing data"}), 400
 
     date = datetime.strptime(date_str, '%Y-%m-%d').date()
-    user_id = get_jwt_identity()
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 404
 
+    student_ids = {int(record['student_id']) for record in records}
+    students = {s.id: s for s in Student.query.filter(Student.id.in_(student_ids)).all()}
+    missing = student_ids - students.keys()
+    if missing:
+        return jsonify({"error": "Student(s) not found", "student_ids": sorted(missing)}), 404
+
+    allowed_site_ids = get_allowed_site_ids(user)
+    if any(s.school_id not in allowed_site_ids for s in students.values()):
+        return jsonify({"error": "Access denied to one or more students"}), 403
+
+    existing_records = {
+        a.student_id: a
+        for a in AttendanceRecord.query.filter(
+            AttendanceRecord.student_id.in_(student_ids),
+            AttendanceRecord.date == date
+        ).all()
+    }
+
+    rollup_deltas = Counter()
     for record in records:
-        student_id = record['student_id']
+        student = students[int(record['student_id'])]
         status = record['status']  # 'present', 'absent', etc.
 
-        existing = AttendanceRecord.query.filter_by(student_id=student_id, date=date).first()
+        existing = existing_records.get(student.id)
         if existing:
+            if existing.status != status:
+                rollup_deltas[(existing.school_id, student.grade, date, existing.status)] -= 1
+                rollup_deltas[(existing.school_id, student.grade, date, status)] += 1
             existing.status = status
-            existing.recorded_by = user_id
+            existing.recorded_by = user.id
         else:
             new = AttendanceRecord(
-                student_id=student_id,
+                student_id=student.id,
+                school_id=student.school_id,
                 date=date,
                 status=status,
-                recorded_by=user_id
+                recorded_by=user.id
             )
             db.session.add(new)
+            existing_records[student.id] = new
+            rollup_deltas[(student.school_id, student.grade, date, status)] += 1
 
+    apply_attendance_deltas(rollup_deltas)
     db.session.commit()
     return jsonify({"message": "Attendance recorded"}), 200
 
@@ -342,22 +379,23 @@ def get_student_attendance(student_id):
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
 # @maintenance_guard()
 @jwt_required()
+@statement_timeout(10000)
 def attendance_stats():
-    school_id = request.args.get('school_id', type=int)
-    grade = request.args.get('grade')
-
-    query = db.session.query(
-        AttendanceRecord.status,
-        func.count(AttendanceRecord.id)
-    ).join(Student)
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 404
 
-    if school_id:
-        query = query.filter(Student.school_id == school_id)
-    if grade:
-        query = query.filter(Student.grade == grade)
+    try:
+        query = _attendance_rollup_query(user)
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    query = query.group_by(AttendanceRecord.status)
-    stats = query.all()
+    stats = query.with_entities(
+        AttendanceDailyRollup.status,
+        func.sum(AttendanceDailyRollup.count)
+    ).group_by(AttendanceDailyRollup.status).all()
 
     total = sum(count for _, count in stats)
     result = []
@@ -371,12 +409,87 @@ def attendance_stats():
 
     return jsonify(result)
 
+
+@students_bp.route('/attendance/stats/breakdown', methods=['GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+# @maintenance_guard()
+@jwt_required()
+@statement_timeout(15000)
+def attendance_stats_breakdown():
+    """
+    Attendance counts per date or per grade for term reports.
+    Usage: ?group_by=date|grade&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+    """
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    group_by = request.args.get('group_by', 'date')
+    if group_by not in ('date', 'grade'):
+        return jsonify({"error": "group_by must be 'date' or 'grade'"}), 400
+
+    try:
+        query = _attendance_rollup_query(user)
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    group_column = getattr(AttendanceDailyRollup, group_by)
+    rows = query.with_entities(
+        group_column,
+        AttendanceDailyRollup.status,
+        func.sum(AttendanceDailyRollup.count)
+    ).group_by(group_column, AttendanceDailyRollup.status).order_by(group_column).all()
+
+    result = {}
+    for key, status, count in rows:
+        key = key.isoformat() if group_by == 'date' else key
+        result.setdefault(key, {})[status] = count
+
+    return jsonify(result)
+
+
+def _attendance_rollup_query(user):
+    """
+    Builds the base rollup query shared by the attendance stats endpoints from
+    the school_id, grade, start_date and end_date query parameters.
+    Raises ValueError for bad dates and PermissionError for disallowed sites.
+    """
+    raw_site_ids = request.args.getlist('school_id', type=int)
+    grade = request.args.get('grade')
+    start = request.args.get('start_date')
+    end = request.args.get('end_date')
+
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+    except ValueError:
+        raise ValueError("Invalid date format, use YYYY-MM-DD")
+
+    allowed_site_ids = get_allowed_site_ids(user, raw_site_ids or None)
+
+    query = AttendanceDailyRollup.query.filter(AttendanceDailyRollup.school_id.in_(allowed_site_ids))
+    if grade:
+        query = query.filter(AttendanceDailyRollup.grade == grade)
+    if start_date:
+        query = query.filter(AttendanceDailyRollup.date >= start_date)
+    if end_date:
+        query = query.filter(AttendanceDailyRollup.date <= end_date)
+    return query
+
 @students_bp.route('/attendance/delete/<int:attendance_id>', methods=['DELETE'])
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
 # @maintenance_guard()
 @jwt_required()
 def delete_attendance(attendance_id):
     attendance = AttendanceRecord.query.get_or_404(attendance_id)
+    # Archived students' attendance was already taken out of the rollup
+    student = Student.query.execution_options(include_deleted=True).get(attendance.student_id)
+    if not student.deleted:
+        apply_attendance_deltas({
+            (attendance.school_id, student.grade, attendance.date, attendance.status): -1
+        })
     db.session.delete(attendance)
     db.session.commit()
     return jsonify({"message": "Deleted"}), 200
@@ -400,6 +513,8 @@ def delete_student(student_id):
         return jsonify({"error": str(e)}), 403
 
     student.soft_delete()
+    apply_student_attendance(student.id, -1)
+    apply_student_meals(student.id, -1)
     db.session.commit()
     return jsonify({"message": "Student soft-deleted successfully"}), 200
 
@@ -421,7 +536,7 @@ def list_deleted_students():
     except (ValueError, PermissionError) as e:
         return jsonify({"error": str(e)}), 403
 
-    students = Student.query.filter(
+    students = Student.query.execution_options(include_deleted=True).filter(
         Student.deleted == True,
         Student.school_id.in_(allowed_site_ids)
     ).all()
@@ -437,13 +552,16 @@ def restore_student(student_id):
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    student = Student.query.get_or_404(student_id)
+    student = Student.query.execution_options(include_deleted=True).get_or_404(student_id)
 
     try:
         allowed_site_ids = get_allowed_site_ids(user, [student.school_id])
     except (ValueError, PermissionError) as e:
         return jsonify({"error": str(e)}), 403
 
+    if student.deleted:
+        apply_student_attendance(student.id, 1)
+        apply_student_meals(student.id, 1)
     student.deleted = False
     student.deleted_at = None
     db.session.commit()
@@ -0,0 +1,127 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func, select, literal_column, cast, Date, DateTime
+from datetime import datetime
+from app.models import (
+    User, Student, AcademicSession, PESession, TermEnum,
+    MealDailyRollup, AttendanceDailyRollup
+)
+from app.extensions import db
+from utils.decorators import role_required
+from utils.access_control import get_allowed_site_ids
+from utils.timeseries import GRANULARITIES, fill_daily, term_label
+from utils.statement_timeout import statement_timeout
+from flask_cors import cross_origin
+
+timeseries_bp = Blueprint('timeseries', __name__)
+
+METRICS = ("meals", "fruit", "attendance_present", "attendance_absent", "session_hours")
+
+
+def _metric_source(metric, allowed_site_ids, session_type):
+    """
+    Returns (date_column, value_expression, filters) for a metric.
+    Meals and attendance read the daily rollups; session hours read the session tables.
+    """
+    if metric in ("meals", "fruit"):
+        value = MealDailyRollup.count if metric == "meals" else MealDailyRollup.fruit_count
+        return MealDailyRollup.date, value, [MealDailyRollup.school_id.in_(allowed_site_ids)]
+
+    if metric.startswith("attendance_"):
+        return AttendanceDailyRollup.date, AttendanceDailyRollup.count, [
+            AttendanceDailyRollup.school_id.in_(allowed_site_ids),
+            AttendanceDailyRollup.status == metric.split("_", 1)[1],
+        ]
+
+    SessionModel = PESession if session_type == "pe" else AcademicSession
+    return SessionModel.date, SessionModel.duration_hours, [
+        SessionModel.student_id == Student.id,
+        Student.school_id.in_(allowed_site_ids),
+    ]
+
+
+@timeseries_bp.route('/', methods=['GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+@role_required('head_tutor', 'head_coach', 'admin', 'superuser')
+@statement_timeout(15000)
+def timeseries():
+    """
+    Dense, gap-filled series for one metric over a date range.
+    Usage: ?metric=meals&granularity=week&start_date=2025-01-01&end_date=2025-12-31&school_id=1&school_id=2
+    metric: meals, fruit, attendance_present, attendance_absent or session_hours (with optional session_type=pe)
+    granularity: day, week, month or term
+    """
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    metric = request.args.get("metric")
+    granularity = request.args.get("granularity", "day")
+    if metric not in METRICS:
+        return jsonify({"error": f"metric must be one of {', '.join(METRICS)}"}), 400
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+
+    try:
+        start_date = datetime.strptime(request.args.get("start_date", ""), "%Y-%m-%d").date()
+        end_date = datetime.strptime(request.args.get("end_date", ""), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "Provide start_date and end_date as YYYY-MM-DD"}), 400
+    if end_date < start_date:
+        return jsonify({"error": "end_date is before start_date"}), 400
+
+    raw_site_ids = request.args.getlist("school_id", type=int)
+    try:
+        allowed_site_ids = get_allowed_site_ids(user, raw_site_ids or None)
+    except (ValueError, PermissionError) as e:
+        return jsonify({"error": str(e)}), 403
+
+    date_column, value, filters = _metric_source(metric, allowed_site_ids, request.args.get("session_type"))
+    filters = filters + [date_column >= start_date, date_column <= end_date]
+    term_starts = current_app.config["SCHOOL_TERM_STARTS"]
+
+    if granularity != "term" and db.session.get_bind().dialect.name == "postgresql":
+        buckets, values = _postgres_series(date_column, value, filters, start_date, end_date, granularity)
+    else:
+        rows = db.session.execute(
+            select(date_column, func.sum(value)).where(*filters).group_by(date_column)
+        ).all()
+        buckets, values = fill_daily(rows, start_date, end_date, granularity, term_starts)
+
+    values = [round(float(v), 2) if metric == "session_hours" else int(v) for v in values]
+    result = {
+        "metric": metric,
+        "granularity": granularity,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "buckets": [b.isoformat() for b in buckets],
+        "values": values,
+    }
+    if granularity == "term":
+        term_names = [t.value for t in TermEnum]
+        result["labels"] = [term_label(b, term_starts, term_names) for b in buckets]
+    return jsonify(result), 200
+
+
+def _postgres_series(date_column, value, filters, start_date, end_date, granularity):
+    """Aggregates and gap-fills in one query with generate_series."""
+    bucket = func.date_trunc(granularity, cast(date_column, DateTime))
+    totals = (
+        select(bucket.label("bucket"), func.sum(value).label("total"))
+        .where(*filters)
+        .group_by(bucket)
+        .subquery()
+    )
+    series = func.generate_series(
+        func.date_trunc(granularity, cast(start_date, DateTime)),
+        cast(end_date, DateTime),
+        literal_column(f"interval '1 {granularity}'"),
+    ).table_valued("bucket").render_derived(name="series")
+
+    rows = db.session.execute(
+        select(cast(series.c.bucket, Date), func.coalesce(totals.c.total, 0))
+        .select_from(series.outerjoin(totals, totals.c.bucket == series.c.bucket))
+        .order_by(series.c.bucket)
+    ).all()
+    return [row[0] for row in rows], [row[1] for row in rows]
@@ -1,16 +1,21 @@
 import os
-import uuid
+import mimetypes
 import filetype
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
 from app.models import Student, Worker, User
 from app.extensions import db
 from utils.decorators import role_required
+from utils.storage import store_uploads, release, upload_root, owning_school_ids
+from utils.access_control import get_allowed_site_ids
+from utils.resumable import UploadError, claim_from_form
+from utils.images import STORED_KEY_RE, VARIANTS, FORMATS, DEFAULT_FORMAT, is_image, derivative_key, render_derivative
 from flask_cors import cross_origin
 
 upload_bp = Blueprint('uploads', __name__)
 
+FILE_CACHE_SECONDS = 365 * 24 * 3600
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
 ALLOWED_MIME_TYPES = {
     'image/jpeg', 'image/png', 'image/gif', 'application/pdf'
@@ -24,43 +29,133 @@ ALLOWED_MIME_TYPES = {
 }
 
 def allowed_file(file):
-    if '.' not in file.filename:
-        return False
-
-    ext = file.filename.rsplit('.', 1)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
+    if not allowed_extension(file.filename):
         return False
 
     header = file.read(262)
-    kind = filetype.guess(header)
     file.seek(0)
+    return allowed_header(header)
+
 
+def allowed_extension(filename):
+    if '.' not in filename:
+        return False
+
+    ext = filename.rsplit('.', 1)[1].lower()
+    return ext in ALLOWED_EXTENSIONS
+
+
+def allowed_header(header):
+    """Checks the sniffed MIME type of the first 262 bytes of a file."""
+    kind = filetype.guess(header)
     if not kind:
         return False
 
     return kind.mime in ALLOWED_MIME_TYPES
 
 
-def save_file(file, folder, old_path=None):
-    filename = secure_filename(file.filename)
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-    upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'static/uploads'), folder)
-    os.makedirs(upload_folder, exist_ok=True)
-    filepath = os.path.join(upload_folder, unique_filename)
-    file.save(filepath)
+def incoming_file_paths(file_keys, check_type=True):
+    """
+    Stores the files sent under `file_keys`, or claims the finalized resumable uploads
+    sent as `<file_key>_upload_id`. Direct uploads are validated and written in
+    parallel. Returns {file_key: stored path} for the files that were sent (and, with
+    check_type, are an allowed type).
+
+    Raises:
+        UploadError: an upload id is unknown, foreign or not finalized.
+    """
+    paths = {}
+    for file_key in file_keys:
+        upload_path = claim_from_form(request.form, file_key, get_jwt_identity())
+        if upload_path:
+            paths[file_key] = upload_path
+
+    files = {key: request.files.get(key) for key in file_keys if key not in paths}
+    paths.update(store_uploads(files, validate=allowed_file if check_type else None))
+    return paths
+
+
+def incoming_file_path(file_key, check_type=True):
+    """Single-file form of incoming_file_paths; returns the stored path or None."""
+    return incoming_file_paths([file_key], check_type).get(file_key)
+
+
+def _file_response(root, key, etag):
+    """
+    Sends a content-addressed file with a strong ETag and long-lived caching.
+    With FILE_ACCEL_REDIRECT_PREFIX set, the body is left to the front proxy
+    (nginx X-Accel-Redirect); USE_X_SENDFILE works through send_from_directory.
+    """
+    prefix = current_app.config.get('FILE_ACCEL_REDIRECT_PREFIX')
+    if prefix:
+        status = 304 if etag in request.if_none_match else 200
+        response = current_app.response_class(status=status)
+        response.headers['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{key}"
+        response.mimetype = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+        response.set_etag(etag)
+    else:
+        # conditional=True answers If-None-Match and Range/If-Range requests
+        response = send_from_directory(root, key, etag=etag, conditional=True)
+
+    # Names never change content, so clients may cache them for good
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = FILE_CACHE_SECONDS
+    response.cache_control.immutable = True
+    return response
+
+
+@upload_bp.route('/files/<path:key>', methods=['GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+@jwt_required()
+def serve_stored_file(key):
+    """
+    Serves a stored file, or one of its resized variants with ?variant=thumb|medium
+    (and optionally &format=webp|jpg), to users with access to a school that
+    references it. Missing variants are rendered on first request; originals
+    that cannot be decoded are served as stored instead.
+    """
+    if not STORED_KEY_RE.match(key):
+        return jsonify({"error": "File not found"}), 404
+
+    root = os.path.abspath(upload_root())
+    if not os.path.exists(os.path.join(root, key)):
+        return jsonify({"error": "File not found"}), 404
 
-    # Optionally delete the old file
-    if old_path and os.path.exists(old_path) and old_path.startswith(upload_folder):
-        try:
-            os.remove(old_path)
-        except Exception:
-            pass  # silently ignore errors
+    user = User.query.get(get_jwt_identity())
+    try:
+        allowed_sites = get_allowed_site_ids(user)
+    except (ValueError, PermissionError) as e:
+        return jsonify({"error": str(e)}), 403
+
+    if not owning_school_ids(key) & set(allowed_sites):
+        return jsonify({"error": "File not found"}), 404
+
+    variant = request.args.get('variant')
+    if not variant:
+        return _file_response(root, key, os.path.basename(key))
 
-    return filepath.replace('\\', '/')  # for frontend/browser
+    fmt = request.args.get('format', DEFAULT_FORMAT)
+    if variant not in VARIANTS or fmt not in FORMATS:
+        return jsonify({"error": f"Invalid variant. Use one of: {', '.join(VARIANTS)}"}), 400
+    if not is_image(key):
+        return jsonify({"error": "Variants are only available for images"}), 400
 
-def serve_file(path):
-    directory, filename = os.path.split(path)
-    return send_from_directory(directory, filename)
+    target = derivative_key(key, variant, fmt)
+    if not os.path.exists(os.path.join(root, target)):
+        from PIL import Image, UnidentifiedImageError  # only needed when rendering here
+
+        try:
+            render_derivative(root, key, variant, fmt)
+        except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+            # Not a decodable image (or too large to decode safely): serve the original as stored
+            current_app.logger.warning("Could not render %s of %s: %s", variant, key, e)
+            return _file_response(root, key, os.path.basename(key))
+        except OSError as e:
+            current_app.logger.warning("Could not render %s of %s: %s", variant, key, e)
+            return jsonify({"error": "Could not generate image variant"}), 422
+
+    return _file_response(root, target, os.path.basename(target))
 
 
 @upload_bp.route('/student/files/<int:student_id>', methods=['POST'])
@@ -76,13 +171,15 @@ def upload_student_files(student_id):
     file_fields = ['photo', 'parent_permission_pdf']
     updated_files = {}
 
-    for file_key in file_fields:
-        file = request.files.get(file_key)
-        if file and allowed_file(file):
-            old_path = getattr(student, file_key, None)
-            new_path = save_file(file, 'students', old_path)
-            setattr(student, file_key, new_path)
-            updated_files[file_key] = new_path
+    try:
+        new_paths = incoming_file_paths(file_fields)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    for file_key, new_path in new_paths.items():
+        release(getattr(student, file_key, None))
+        setattr(student, file_key, new_path)
+        updated_files[file_key] = new_path
 
     if not updated_files:
         return jsonify({"error": "No valid files uploaded"}), 400
@@ -106,13 +203,15 @@ def upload_worker_files(worker_id):
     file_fields = ['cv_pdf', 'clearance_pdf', 'child_protection_pdf', 'photo']
     updated_files = {}
 
-    for file_key in file_fields:
-        file = request.files.get(file_key)
-        if file and allowed_file(file):
-            old_path = getattr(worker, file_key, None)
-            new_path = save_file(file, 'workers', old_path)
-            setattr(worker, file_key, new_path)
-            updated_files[file_key] = new_path
+    try:
+        new_paths = incoming_file_paths(file_fields)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    for file_key, new_path in new_paths.items():
+        release(getattr(worker, file_key, None))
+        setattr(worker, file_key, new_path)
+        updated_files[file_key] = new_path
 
     if not updated_files:
         return jsonify({"error": "No valid files uploaded"}), 400
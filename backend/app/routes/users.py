@@ -55,7 +55,7 @@ def create_user():
         return jsonify({"error": f"Missing required fields: {missing}"}), 400
 
     # Check for duplicate user
-    existing_user = User.query.filter_by(username=username).first()
+    existing_user = User.query.execution_options(include_deleted=True).filter_by(username=username).first()
     if existing_user:
         return jsonify({
             "error": "A user with this username already exists.",
@@ -121,7 +121,7 @@ def update_user(user_id):
 
     if 'username' in data:
         new_username = data['username'].strip()
-        if new_username != user.username and User.query.filter_by(username=new_username).first():
+        if new_username != user.username and User.query.execution_options(include_deleted=True).filter_by(username=new_username).first():
             return jsonify({"error": "Username already exists"}), 400
         user.username = new_username
 
@@ -168,13 +168,13 @@ def update_own_account():
 
     if 'username' in data:
         new_username = data['username'].strip()
-        if new_username != user.username and User.query.filter_by(username=new_username).first():
+        if new_username != user.username and User.query.execution_options(include_deleted=True).filter_by(username=new_username).first():
             return jsonify({"error": "Username already exists"}), 400
         user.username = new_username
 
     if 'email' in data:
         new_email = data['email'].strip()
-        if new_email != user.email and User.query.filter_by(email=new_email).first():
+        if new_email != user.email and User.query.execution_options(include_deleted=True).filter_by(email=new_email).first():
             return jsonify({"error": "Email already exists"}), 400
         user.email = new_email
 
@@ -337,7 +337,7 @@ def list_removal_reviews():
 @jwt_required()
 @role_required('superuser', 'hr')
 def restore_user(user_id):
-    user = User.query.filter_by(id=user_id, deleted=True).first()
+    user = User.query.execution_options(include_deleted=True).filter_by(id=user_id, deleted=True).first()
     if not user:
         return jsonify({"error": "Deleted user not found"}), 404
 
@@ -2,24 +2,15 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import Worker, TrainingRecord, User
 from app.extensions import db
-from werkzeug.utils import secure_filename
 from datetime import datetime
-import os
 from flask_cors import cross_origin
 from utils.maintenance import maintenance_guard
 from utils.formSchema import generate_schema_from_model
+from utils.resumable import UploadError
+from .uploads import incoming_file_path
+from utils.images import variant_urls
 
 worker_trainings_bp = Blueprint('workertrainings', __name__)
-UPLOAD_FOLDER = 'uploads/trainings'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-def save_training_photo(file, prefix="training"):
-    if file:
-        filename = secure_filename(f"{prefix}_{file.filename}")
-        path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(path)
-        return path
-    return None
 
 @worker_trainings_bp.route("/form_schema", methods=["GET"])
 @jwt_required()
@@ -50,7 +41,6 @@ def add_training(worker_id):
 
     title = request.form.get('title')
     date_str = request.form.get('date')
-    photo = request.files.get('photo')
     training_description = request.form.get('training_description')
     training_outcomes = request.form.get('training_outcomes')
     venue = request.form.get('venue')
@@ -63,7 +53,10 @@ def add_training(worker_id):
     except ValueError:
         return jsonify({"error": "Invalid date format"}), 400
 
-    photo_path = save_training_photo(photo, prefix=worker.name)
+    try:
+        photo_path = incoming_file_path('photo', check_type=False)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
 
     training = TrainingRecord(
         worker_id=worker.id,
@@ -92,6 +85,7 @@ def list_trainings(worker_id):
         "title": t.title,
         "date": t.date.isoformat(),
         "photo": t.photo,
+        "photo_variants": variant_urls(t.photo),
         "training_description":t.training_description,
         "training_outcomes":t.training_outcomes,
         "venue":t.venue,
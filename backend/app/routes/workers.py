@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Worker, User, Role
+from app.models import Worker, User, Role, School
 from app.extensions import db
 from utils.decorators import role_required
 from utils.pagination import apply_pagination_and_search
@@ -8,25 +8,21 @@ from utils.access_control import get_allowed_site_ids
 from utils.maintenance import maintenance_guard
 from flask_cors import cross_origin
 import os
-import zipfile
-from io import BytesIO
+import unicodedata
+from urllib.parse import quote
 from werkzeug.utils import secure_filename
 from datetime import datetime
 from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 from utils.formSchema import generate_schema_from_model
-from .uploads import allowed_file
+from .uploads import allowed_file, incoming_file_paths
+from utils.storage import release
+from utils.resumable import UploadError
+from utils.zipstream import stream_zip, existing
 
 workers_bp = Blueprint('workers', __name__)
-UPLOAD_FOLDER = 'uploads/workers'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-def save_file(file, prefix=""):
-    if file:
-        filename = secure_filename(f"{prefix}_{file.filename}")
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        return filepath
-    return None
+WORKER_FILE_FIELDS = ['photo', 'cv_pdf', 'id_copy_pdf', 'clearance_pdf', 'child_protection_pdf']
 
 @workers_bp.route('/list', methods=['GET'])
 @cross_origin(origins="http://localhost:3000", supports_credentials=True)
@@ -160,12 +156,11 @@ def create_worker():
             "existing_worker": existing_worker.to_dict()
         }), 409
 
-    # Handle file uploads
-    photo = save_file(request.files.get('photo'), prefix=name)
-    cv_pdf = save_file(request.files.get('cv_pdf'), prefix=name)
-    id_copy_pdf = save_file(request.files.get('id_copy_pdf'), prefix=name)
-    clearance_pdf = save_file(request.files.get('clearance_pdf'), prefix=name)
-    child_protection_pdf = save_file(request.files.get('child_protection_pdf'), prefix=name)
+    # Handle file uploads (direct, or finished resumable uploads sent as <field>_upload_id)
+    try:
+        paths = incoming_file_paths(WORKER_FILE_FIELDS, check_type=False)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
 
     #  Create and save the Worker
     worker = Worker(
@@ -177,11 +172,11 @@ def create_worker():
         contact_number=contact_number,
         email=email,
         start_date=start_date,
-        photo=photo,
-        cv_pdf=cv_pdf,
-        id_copy_pdf=id_copy_pdf,
-        clearance_pdf=clearance_pdf,
-        child_protection_pdf=child_protection_pdf
+        photo=paths.get('photo'),
+        cv_pdf=paths.get('cv_pdf'),
+        id_copy_pdf=paths.get('id_copy_pdf'),
+        clearance_pdf=paths.get('clearance_pdf'),
+        child_protection_pdf=paths.get('child_protection_pdf')
     )
 
     db.session.add(worker)
@@ -245,28 +240,15 @@ def update_worker(worker_id):
         except ValueError:
             return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD"}), 400
 
-    # Update file uploads if provided
-    photo = request.files.get('photo')
-    cv_pdf = request.files.get('cv_pdf')
-    id_copy_pdf = request.files.get('id_copy_pdf')
-    clearance_pdf = request.files.get('clearance_pdf')
-    child_protection_pdf = request.files.get('child_protection_pdf')
-
-    if photo:
-        photo_path = save_file(photo, prefix=worker.name)
-        worker.photo = photo_path
-    if cv_pdf:
-        cv_path = save_file(cv_pdf, prefix=worker.name)
-        worker.cv_pdf = cv_path
-    if id_copy_pdf:
-        id_copy_path = save_file(id_copy_pdf, prefix=worker.name)
-        worker.id_copy_pdf = id_copy_path
-    if clearance_pdf:
-        clearance_path = save_file(clearance_pdf, prefix=worker.name)
-        worker.clearance_pdf = clearance_path
-    if child_protection_pdf:
-        child_protection_path = save_file(child_protection_pdf, prefix=worker.name)
-        worker.child_protection_pdf = child_protection_path
+    # Update file uploads if provided, dropping the reference to any replaced file
+    try:
+        new_paths = incoming_file_paths(WORKER_FILE_FIELDS, check_type=False)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    for file_key, new_path in new_paths.items():
+        release(getattr(worker, file_key))
+        setattr(worker, file_key, new_path)
 
     db.session.commit()
 
@@ -293,7 +275,7 @@ def list_deleted_workers():
     except (ValueError, PermissionError) as e:
         return jsonify({"error": str(e)}), 403
 
-    query = Worker.query.filter(
+    query = Worker.query.execution_options(include_deleted=True).filter(
         Worker.deleted == True,
         Worker.school_id.in_(allowed_site_ids)
     )
@@ -308,7 +290,7 @@ def list_deleted_workers():
 @jwt_required()
 @role_required('hr', 'superuser')
 def restore_worker(worker_id):
-    worker = Worker.query.get_or_404(worker_id)
+    worker = Worker.query.execution_options(include_deleted=True).get_or_404(worker_id)
     user = User.query.get(get_jwt_identity())
     try:
         allowed_site_ids = get_allowed_site_ids(user, [worker.school_id])
@@ -376,6 +358,40 @@ def download_worker_documents(worker_id):
     except (ValueError, PermissionError) as e:
         return jsonify({"error": str(e)}), 403
 
+    zip_filename = f"{worker.name.replace(' ', '_')}_documents.zip"
+    entries = existing(_worker_zip_entries(worker, secure_filename(worker.name) or f"worker_{worker.id}"))
+    return _zip_response(entries, zip_filename)
+
+
+@workers_bp.route('/download/school/<int:school_id>/', methods=['GET'])
+@cross_origin(origins="http://localhost:3000", supports_credentials=True)
+# @maintenance_guard()
+@jwt_required()
+@role_required('superuser', 'admin', 'hr')
+def download_school_worker_documents(school_id):
+    """HR audit pack: every worker's documents for one school, one folder per worker."""
+    school = School.query.get_or_404(school_id)
+    user = User.query.get(get_jwt_identity())
+    try:
+        get_allowed_site_ids(user, [school.id])
+    except (ValueError, PermissionError) as e:
+        return jsonify({"error": str(e)}), 403
+
+    workers = Worker.query.filter_by(school_id=school.id).options(
+        selectinload(Worker.trainings)
+    ).order_by(Worker.last_name, Worker.name).all()
+
+    entries = []
+    for worker in workers:
+        folder = secure_filename(f"{worker.name}_{worker.last_name}_{worker.id}")
+        entries.extend(_worker_zip_entries(worker, folder))
+
+    zip_filename = f"{school.name.replace(' ', '_')}_worker_documents.zip"
+    return _zip_response(existing(entries), zip_filename)
+
+
+def _worker_zip_entries(worker, folder):
+    """(arcname, path) pairs for a worker's documents and training photos."""
     file_paths = {
         "photo": worker.photo,
         "cv_pdf": worker.cv_pdf,
@@ -383,24 +399,26 @@ def download_worker_documents(worker_id):
         "child_protection_pdf": worker.child_protection_pdf,
         "id_copy_pdf": worker.id_copy_pdf,
     }
-
     for i, training in enumerate(worker.trainings):
         if training.photo:
-            file_paths[f"training_{i+1}_{training.title}.jpg"] = training.photo
+            file_paths[f"training_{i+1}_{secure_filename(training.title)}"] = training.photo
 
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-        for label, path in file_paths.items():
-            if path and os.path.exists(path):
-                arcname = f"{worker.name.replace(' ', '_')}/{os.path.basename(path)}"
-                zip_file.write(path, arcname=arcname)
+    # Stored names are content hashes, so name entries by document and keep the extension
+    return [
+        (f"{folder}/{label}{os.path.splitext(path)[1]}", path)
+        for label, path in file_paths.items() if path
+    ]
 
-    zip_buffer.seek(0)
-    zip_filename = f"{worker.name.replace(' ', '_')}_documents.zip"
 
-    return send_file(
-        zip_buffer,
-        mimetype="application/zip",
-        as_attachment=True,
-        download_name=zip_filename
-    )
+def _zip_response(entries, zip_filename):
+    response = Response(stream_zip(entries), mimetype="application/zip")
+    # Same header send_file(download_name=...) builds: quoted, plus an RFC 5987
+    # filename* with an ASCII fallback for non-ASCII names
+    try:
+        zip_filename.encode("ascii")
+        names = {"filename": zip_filename}
+    except UnicodeEncodeError:
+        fallback = unicodedata.normalize("NFKD", zip_filename).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": fallback, "filename*": f"UTF-8''{quote(zip_filename, safe='!#$&+^`|~')}"}
+    response.headers.set("Content-Disposition", "attachment", **names)
+    return response
@@ -0,0 +1,64 @@
+"""
+Import-time budget for building the app, from `python -X importtime`.
+
+    python bench/import_budget.py [--budget-ms 1500] [--top 15]
+
+Runs `create_app()` in a fresh interpreter, prints the slowest imports and exits
+non-zero if the total import time exceeds the budget or if a module that should
+only load on demand (pandas, numpy, PIL) was imported at boot.
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("pandas", "numpy", "PIL")
+
+
+def import_times():
+    """[(module, self_us, cumulative_us)] in the order -X importtime reports them."""
+    env = dict(os.environ)
+    env.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+    env.setdefault("JWT_SECRET_KEY", "import-budget-" + "x" * 32)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from app import create_app; create_app()"],
+        cwd=BACKEND, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        sys.exit(result.stderr)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 1500)))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = import_times()
+    total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+    for name, _, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:9.1f} ms  {name}")
+    print(f"{total_ms:9.1f} ms  total ({len(rows)} modules, budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    loaded = sorted({name for name, _, _ in rows if name.split(".")[0] in LAZY_MODULES})
+    if loaded:
+        failures.append(f"imported at boot but should load lazily: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Load test of the gunicorn profiles in gunicorn.conf.py against the hot read endpoints.
+
+    BENCH_USERNAME=... BENCH_PASSWORD=... \\
+        python bench/load_profiles.py [--profiles gthread,gevent,sync] [--concurrency 32] [--seconds 20]
+
+Each profile is started as its own gunicorn on a local port with the current
+environment (point SQLALCHEMY_DATABASE_URI at a Postgres with realistic data).
+The script then logs in once and has `concurrency` client threads cycle through
+the endpoints for a fixed time, after a short warm-up. It reports throughput,
+latency percentiles and errors per profile. Run it on the same machine size as
+production and keep WEB_CONCURRENCY and the other settings fixed between runs.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from http.cookies import SimpleCookie
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENDPOINTS = [
+    "/dashboard/summary",
+    "/students/list?page=1&per_page=50",
+    "/students/attendance/stats",
+    f"/mealstats/daily?date={time.strftime('%Y-%m-%d')}",
+    f"/mealstats/monthly?year={time.strftime('%Y')}&month={time.localtime().tm_mon}",
+    "/workers/list?page=1&per_page=50",
+]
+
+
+def wait_for_port(server, port, seconds=30):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}; see its output above")
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not start listening on port {port}")
+
+
+def login(port, username, password):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    body = json.dumps({"username": username, "password": password})
+    conn.request("POST", "/auth/login", body, {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"Login failed with {response.status}")
+    cookie = SimpleCookie()
+    for header in response.headers.get_all("Set-Cookie") or []:
+        cookie.load(header)
+    return "; ".join(f"{k}={m.value}" for k, m in cookie.items() if k == "access_token_cookie")
+
+
+def client(port, cookie, endpoints, stop, warmup_until, results):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    latencies, errors, i = [], 0, 0
+    while not stop.is_set():
+        path = endpoints[i % len(endpoints)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers={"Cookie": cookie})
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            ok = False
+        if time.time() < warmup_until:
+            continue
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    results.append((latencies, errors))
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float("nan")
+
+
+def run_profile(profile, args, port):
+    env = dict(os.environ, GUNICORN_PROFILE=profile, PORT=str(port), GUNICORN_ACCESS_LOG="/dev/null")
+    env.setdefault("RATELIMIT_ENABLED", "false")  # one user would hit the hourly default limit
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        cwd=BACKEND, env=env,
+    )
+    try:
+        wait_for_port(server, port)
+        cookie = login(port, args.username, args.password)
+        stop, results = threading.Event(), []
+        warmup_until = time.time() + args.warmup
+        threads = [
+            threading.Thread(target=client, args=(port, cookie, args.endpoints, stop, warmup_until, results))
+            for _ in range(args.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(args.warmup + args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(l for ls, _ in results for l in ls)
+    errors = sum(e for _, e in results)
+    print(
+        f"{profile:>8}: {len(latencies) / args.seconds:8.1f} req/s  "
+        f"p50 {percentile(latencies, 50) * 1000:7.1f} ms  "
+        f"p95 {percentile(latencies, 95) * 1000:7.1f} ms  "
+        f"p99 {percentile(latencies, 99) * 1000:7.1f} ms  errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", default="gthread,gevent,sync")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--endpoint", dest="endpoints", action="append", help="Repeat to replace the default set")
+    parser.add_argument("--username", default=os.getenv("BENCH_USERNAME"))
+    parser.add_argument("--password", default=os.getenv("BENCH_PASSWORD"))
+    args = parser.parse_args()
+    args.endpoints = args.endpoints or DEFAULT_ENDPOINTS
+    if not args.username or not args.password:
+        parser.error("Set BENCH_USERNAME/BENCH_PASSWORD (or --username/--password)")
+
+    for profile in args.profiles.split(","):
+        try:
+            run_profile(profile.strip(), args, args.port)
+        except RuntimeError as e:
+            print(f"{profile:>8}: skipped, {e}")
+
+
+if __name__ == "__main__":
+    main()
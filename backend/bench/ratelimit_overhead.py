@@ -0,0 +1,67 @@
+"""
+Per-request cost of rate limiting with each storage backend.
+
+    REDIS_URL=redis://localhost:6379/0 python bench/ratelimit_overhead.py [requests]
+
+Times the same trivial endpoint without a limiter, with in-memory counters,
+with plain Redis (one round trip per hit) and with the local-first storage
+(utils/ratelimit_storage.py). Redis backends are skipped when REDIS_URL is
+unset or unreachable.
+"""
+import os
+import sys
+import time
+from flask import Flask
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from limits.storage import storage_from_string
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.ratelimit_storage  # noqa: F401  registers localfirst+redis://
+
+
+def build_app(storage_uri):
+    app = Flask(__name__)
+    if storage_uri:
+        Limiter(
+            get_remote_address,
+            app=app,
+            storage_uri=storage_uri,
+            default_limits=["200000 per day", "6000 per hour"],
+        )
+
+    @app.route("/ping")
+    def ping():
+        return "pong"
+
+    return app
+
+
+def per_request_us(storage_uri, requests):
+    client = build_app(storage_uri).test_client()
+    for _ in range(100):  # warm up connections and code paths
+        client.get("/ping")
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get("/ping")
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    redis_url = os.getenv("REDIS_URL")
+    backends = [("no limiter", None), ("memory", "memory://")]
+    if redis_url and storage_from_string(redis_url).check():
+        backends += [("redis", redis_url), ("local-first redis", f"localfirst+{redis_url}")]
+    else:
+        print("REDIS_URL unset or unreachable; skipping the Redis backends")
+
+    baseline = None
+    for name, uri in backends:
+        us = per_request_us(uri, requests)
+        baseline = us if baseline is None else baseline
+        print(f"{name:>18}: {us:8.1f} us/request  (+{us - baseline:.1f} us for limiting)")
+
+
+if __name__ == "__main__":
+    main()
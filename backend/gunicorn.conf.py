@@ -0,0 +1,81 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+GUNICORN_PROFILE selects the worker model:
+    gthread (default)  a few processes x GUNICORN_THREADS threads; requests mostly
+                       wait on Postgres, and threads release the GIL while they do
+    gevent             greenlets with psycopg2 made cooperative; needs
+                       `pip install gevent`
+    sync               the old one-request-per-process behaviour, for comparison
+
+Keep GUNICORN_THREADS (or gevent's worker_connections that actually hit the
+database) within the SQLAlchemy pool size + overflow, or requests queue on the pool.
+Compare profiles with bench/load_profiles.py.
+"""
+import os
+import multiprocessing
+
+profile = os.getenv("GUNICORN_PROFILE", "gthread")
+if profile not in ("gthread", "gevent", "sync"):
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE {profile!r}; use gthread, gevent or sync")
+
+if profile == "gevent":
+    # Patch before the app (and ssl, socket, threading) is imported by preload_app
+    from gevent import monkey
+    monkey.patch_all()
+
+cpus = multiprocessing.cpu_count()
+
+wsgi_app = "app:create_app()"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = profile
+workers = int(os.getenv("WEB_CONCURRENCY", {"gthread": cpus * 2, "gevent": cpus, "sync": cpus * 2 + 1}[profile]))
+threads = int(os.getenv("GUNICORN_THREADS", 8)) if profile == "gthread" else 1
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 200))  # gevent only
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Recycle workers now and then so slow leaks never add up; jitter keeps them
+# from all restarting at the same moment
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))  # large uploads and ZIP downloads
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))  # behind a load balancer that reuses connections
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def _make_psycopg2_green():
+    """Lets other greenlets run while psycopg2 waits on the server (what psycogreen does)."""
+    from psycopg2 import extensions, OperationalError
+    from gevent.socket import wait_read, wait_write
+
+    def wait_callback(conn, timeout=None):
+        while True:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                return
+            if state == extensions.POLL_READ:
+                wait_read(conn.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(conn.fileno(), timeout=timeout)
+            else:
+                raise OperationalError(f"Bad result from poll: {state!r}")
+
+    extensions.set_wait_callback(wait_callback)
+
+
+def post_fork(server, worker):
+    if profile == "gevent":
+        _make_psycopg2_green()
+
+    if preload_app:
+        # Connections opened in the master must not be shared between workers
+        from app.extensions import db
+        with server.app.wsgi().app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
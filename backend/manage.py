@@ -1,8 +1,13 @@
 from app import create_app
 from app.extensions import db
-from flask_migrate import MigrateCommand
 from flask.cli import with_appcontext
-from flask_migrate import upgrade, migrate, init, revision
+from flask_migrate import upgrade, migrate, init, revision, stamp
+from sqlalchemy import inspect
+from utils.rollups import rebuild_attendance_rollup, rebuild_meal_rollup
+from utils.query_plans import HOT_QUERIES, explain
+from utils.upload_gc import collect_garbage, rebuild_reference_counts
+from utils.audit_partitions import ensure_partitions, drop_partitions_before
+from utils.audit_search import search as search_audit_log, parse_since
 import click
 
 app = create_app()
@@ -24,3 +29,184 @@ def db_migrate():
 def db_upgrade():
     """Applies migrations"""
     upgrade()
+
+# Revisions around the audit_logs partitioning, which create_all can't express
+PRE_AUDIT_PARTITIONS = "e1b4c7a9d265"
+AUDIT_PARTITIONS = "f4a9e2d6b318"
+
+@app.cli.command("create-tables")
+@with_appcontext
+def create_tables():
+    """Creates the schema on an empty database and stamps it at the latest migration"""
+    # The root migration alters tables that already exist, so a fresh database
+    # can't start from `flask db upgrade`; build it from the models instead
+    fresh = not inspect(db.engine).has_table("alembic_version")
+    db.create_all()
+    if not fresh:
+        click.echo("Missing tables created; migrations left as they were")
+        return
+
+    if db.engine.dialect.name == "postgresql":
+        # Rebuild audit_logs as the monthly-partitioned table the migration makes
+        stamp(revision=PRE_AUDIT_PARTITIONS)
+        upgrade(revision=AUDIT_PARTITIONS)
+    stamp(revision="head")
+    click.echo("Tables created and stamped at the latest migration")
+
+@app.cli.command("rebuild-attendance-rollup")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), help="First date to rebuild (inclusive)")
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), help="Last date to rebuild (inclusive)")
+@with_appcontext
+def rebuild_attendance_rollup_command(start, end):
+    """Recomputes attendance_daily_rollups from attendance_records"""
+    rows = rebuild_attendance_rollup(
+        start_date=start.date() if start else None,
+        end_date=end.date() if end else None,
+    )
+    db.session.commit()
+    click.echo(f"Rebuilt attendance rollup: {rows} rows")
+
+@app.cli.command("rebuild-meal-rollup")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), help="First date to rebuild (inclusive)")
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), help="Last date to rebuild (inclusive)")
+@with_appcontext
+def rebuild_meal_rollup_command(start, end):
+    """Recomputes meal_daily_rollups from meal_distributions"""
+    rows = rebuild_meal_rollup(
+        start_date=start.date() if start else None,
+        end_date=end.date() if end else None,
+    )
+    db.session.commit()
+    click.echo(f"Rebuilt meal rollup: {rows} rows")
+
+@app.cli.command("explain-hot-queries")
+@click.option("--verbose", is_flag=True, help="Print the full plan for every query")
+@with_appcontext
+def explain_hot_queries(verbose):
+    """Checks with EXPLAIN that every hot endpoint query is served by an index"""
+    failures = []
+    for name in HOT_QUERIES:
+        uses_index, plan = explain(name)
+        click.echo(f"{'OK  ' if uses_index else 'FAIL'} {name}")
+        if verbose or not uses_index:
+            click.echo(plan)
+        if not uses_index:
+            failures.append(name)
+
+    if failures:
+        raise click.ClickException(f"{len(failures)} hot queries are not using an index: {', '.join(failures)}")
+
+@app.cli.command("gc-uploads")
+@click.option("--grace-hours", default=24, show_default=True, help="Only delete files older than this")
+@click.option("--dry-run", is_flag=True, help="Report what would be deleted without deleting")
+@click.option("--reindex/--no-reindex", default=True, show_default=True, help="Recount file references before collecting")
+@click.option("--batch-size", default=1000, show_default=True, help="Files checked per database round trip")
+@click.option("--dir", "extra_dirs", multiple=True, type=click.Path(exists=True, file_okay=False), help="Extra legacy upload directory to scan (repeatable)")
+@click.option("--verbose", is_flag=True, help="List every file deleted")
+@with_appcontext
+def gc_uploads(grace_hours, dry_run, reindex, batch_size, extra_dirs, verbose):
+    """Deletes upload files that no record references"""
+    if reindex:
+        # Left uncommitted on a dry run; the rollback below discards it
+        rows = rebuild_reference_counts()
+        click.echo(f"Recounted references: {rows} stored files referenced")
+
+    def report_file(path, size):
+        if verbose or dry_run:
+            click.echo(f"{'would delete' if dry_run else 'deleted'} {path} ({size} bytes)")
+
+    report = collect_garbage(
+        grace_hours=grace_hours,
+        dry_run=dry_run,
+        batch_size=batch_size,
+        extra_dirs=extra_dirs,
+        on_delete=report_file,
+    )
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    click.echo(
+        f"Scanned {report.scanned} files, {'would delete' if dry_run else 'deleted'} "
+        f"{report.deleted} ({report.bytes / 1024 / 1024:.1f} MB), removed {report.rows} stored_files rows"
+    )
+
+@app.cli.command("audit-partitions")
+@click.option("--months-ahead", default=3, show_default=True, help="Months of future partitions to keep ready")
+@with_appcontext
+def audit_partitions(months_ahead):
+    """Creates upcoming monthly audit_logs partitions (Postgres only; run monthly)"""
+    created = ensure_partitions(months_ahead=months_ahead)
+    db.session.commit()
+    click.echo(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+
+@app.cli.command("audit-retention")
+@click.option("--keep-months", default=12, show_default=True, help="Whole months of audit logs to keep")
+@click.option("--dry-run", is_flag=True, help="Show what would be removed")
+@with_appcontext
+def audit_retention(keep_months, dry_run):
+    """Drops audit_logs partitions older than the retention period"""
+    removed = drop_partitions_before(keep_months, dry_run=dry_run)
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    click.echo(f"{'Would remove' if dry_run else 'Removed'}: {', '.join(removed) or 'nothing'}")
+
+@app.cli.command("audit-search")
+@click.option("--event", help="Event type or prefix, e.g. LOGIN_FAILED")
+@click.option("--user", "user_id", help="User id")
+@click.option("--ip", help="Exact client IP")
+@click.option("--since", help="Relative start, e.g. 7d, 12h, 30m")
+@click.option("--start", type=click.DateTime(), help="Start time (UTC)")
+@click.option("--end", type=click.DateTime(), help="End time (UTC)")
+@click.option("--limit", default=0, help="Stop after this many matches (0 = all)")
+@click.option("--json", "as_json", is_flag=True, help="Print matches as JSON lines")
+@click.option("--file", "path", default=None, help="Audit log path (defaults to AUDIT_LOG_FILE)")
+def audit_search(event, user_id, ip, since, start, end, limit, as_json, path):
+    """Searches logs/audit.log and its rotated files using an offset index per file"""
+    import json
+    from utils.audit import AUDIT_LOG_FILE
+
+    if since:
+        try:
+            start = parse_since(since)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--since")
+
+    matches = search_audit_log(event=event, user_id=user_id, ip=ip, start=start, end=end, path=path or AUDIT_LOG_FILE)
+    count = 0
+    for entry in matches:
+        if as_json:
+            click.echo(json.dumps(entry, default=str))
+        else:
+            click.echo(
+                f"{entry['ts']:%Y-%m-%d %H:%M:%S} {entry.get('level', '')} {entry.get('event')} "
+                f"user={entry.get('user_id') or '-'} ip={entry.get('ip') or '-'} {entry.get('description') or ''}"
+            )
+        count += 1
+        if limit and count >= limit:
+            break
+    click.echo(f"{count} matches", err=True)
+
+@app.cli.command("replica-check")
+@with_appcontext
+def replica_check():
+    """Checks the read replica bind answers and reports its replication lag (Postgres)"""
+    from sqlalchemy import text
+    from utils.replica import REPLICA_BIND
+
+    if REPLICA_BIND not in db.engines:
+        raise click.ClickException("DATABASE_REPLICA_URL is not set; all queries use the primary")
+
+    for name, engine in (("primary", db.engines[None]), ("replica", db.engines[REPLICA_BIND])):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            line = f"{name}: ok ({engine.url.render_as_string(hide_password=True)})"
+            if name == "replica" and engine.dialect.name == "postgresql":
+                lag = conn.execute(text(
+                    "SELECT CASE WHEN pg_is_in_recovery() "
+                    "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                )).scalar()
+                line += " lag unknown (not a standby)" if lag is None else f" lag {lag:.1f}s"
+            click.echo(line)
@@ -0,0 +1,48 @@
+"""added attendance daily rollup
+
+Revision ID: 4e1f9a2c7b30
+Revises: 00cc812371b1
+Create Date: 2026-10-19 09:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e1f9a2c7b30'
+down_revision = '00cc812371b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attendance_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('school_id', sa.Integer(), nullable=False),
+    sa.Column('grade', sa.String(length=50), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('school_id', 'grade', 'date', 'status', name='uq_attendance_rollup_key')
+    )
+    with op.batch_alter_table('attendance_daily_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_rollup_school_date', ['school_id', 'date'], unique=False)
+
+    # Backfill from existing attendance records, as rebuild_attendance_rollup does
+    op.execute(
+        "INSERT INTO attendance_daily_rollups (school_id, grade, date, status, count) "
+        "SELECT a.school_id, s.grade, a.date, a.status, COUNT(a.id) "
+        "FROM attendance_records a JOIN students s ON s.id = a.student_id "
+        "WHERE NOT s.deleted "
+        "GROUP BY a.school_id, s.grade, a.date, a.status"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_daily_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_rollup_school_date')
+
+    op.drop_table('attendance_daily_rollups')
@@ -0,0 +1,72 @@
+"""indexed hot foreign key filters
+
+Revision ID: 8a3d5c1e9f42
+Revises: 4e1f9a2c7b30
+Create Date: 2026-10-19 11:03:17.902554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a3d5c1e9f42'
+down_revision = '4e1f9a2c7b30'
+branch_labels = None
+depends_on = None
+
+LIVE_ROWS = dict(
+    postgresql_where=sa.text('deleted = false'),
+    sqlite_where=sa.text('deleted = 0'),
+)
+
+
+def upgrade():
+    # assessments.student_id is already covered by uq_student_term (student_id, term)
+    with op.batch_alter_table('academic_sessions', schema=None) as batch_op:
+        batch_op.create_index('ix_academic_sessions_student_date', ['student_id', sa.text('date DESC')], unique=False)
+
+    with op.batch_alter_table('pe_sessions', schema=None) as batch_op:
+        batch_op.create_index('ix_pe_sessions_student_date', ['student_id', sa.text('date DESC')], unique=False)
+
+    with op.batch_alter_table('meal_distributions', schema=None) as batch_op:
+        batch_op.create_index('ix_meal_distributions_school_date', ['school_id', 'date'], unique=False)
+        batch_op.create_index('ix_meal_distributions_student_date', ['student_id', sa.text('date DESC')], unique=False)
+
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_records_school_date', ['school_id', 'date'], unique=False)
+        batch_op.create_index('ix_attendance_records_student_date', ['student_id', 'date'], unique=False)
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index('ix_students_school_grade_live', ['school_id', 'grade'], unique=False, **LIVE_ROWS)
+
+    with op.batch_alter_table('workers', schema=None) as batch_op:
+        batch_op.create_index('ix_workers_school_role_live', ['school_id', 'role_id'], unique=False, **LIVE_ROWS)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_school_id'), ['school_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_school_id'))
+
+    with op.batch_alter_table('workers', schema=None) as batch_op:
+        batch_op.drop_index('ix_workers_school_role_live')
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index('ix_students_school_grade_live')
+
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_records_student_date')
+        batch_op.drop_index('ix_attendance_records_school_date')
+
+    with op.batch_alter_table('meal_distributions', schema=None) as batch_op:
+        batch_op.drop_index('ix_meal_distributions_student_date')
+        batch_op.drop_index('ix_meal_distributions_school_date')
+
+    with op.batch_alter_table('pe_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_pe_sessions_student_date')
+
+    with op.batch_alter_table('academic_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_academic_sessions_student_date')
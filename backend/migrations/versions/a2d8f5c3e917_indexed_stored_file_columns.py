@@ -0,0 +1,40 @@
+"""indexed stored file columns
+
+Revision ID: a2d8f5c3e917
+Revises: f4a9e2d6b318
+Create Date: 2026-10-19 18:52:40.118306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2d8f5c3e917'
+down_revision = 'f4a9e2d6b318'
+branch_labels = None
+depends_on = None
+
+# Looked up by path on every file GET (owning_school_ids) and by gc-uploads
+FILE_COLUMNS = {
+    'students': ['photo', 'parent_permission_pdf'],
+    'workers': ['photo', 'cv_pdf', 'id_copy_pdf', 'clearance_pdf', 'child_protection_pdf'],
+    'meal_distributions': ['photo'],
+    'training_records': ['photo'],
+    'academic_sessions': ['photo'],
+    'pe_sessions': ['photo'],
+}
+
+
+def upgrade():
+    for table, columns in FILE_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.create_index(batch_op.f(f'ix_{table}_{column}'), [column], unique=False)
+
+
+def downgrade():
+    for table, columns in FILE_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.drop_index(batch_op.f(f'ix_{table}_{column}'))
@@ -0,0 +1,33 @@
+"""partial indexes for live users
+
+Revision ID: b7c2e4f81d06
+Revises: 8a3d5c1e9f42
+Create Date: 2026-10-19 13:41:05.227391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c2e4f81d06'
+down_revision = '8a3d5c1e9f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Soft-deleted rows are now filtered on every ORM query, so only live users need indexing
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_school_id'))
+        batch_op.create_index(
+            'ix_users_school_live', ['school_id', 'role_id'], unique=False,
+            postgresql_where=sa.text('deleted = false'),
+            sqlite_where=sa.text('deleted = 0'),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_school_live')
+        batch_op.create_index(batch_op.f('ix_users_school_id'), ['school_id'], unique=False)
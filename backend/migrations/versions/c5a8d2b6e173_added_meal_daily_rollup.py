@@ -0,0 +1,46 @@
+"""added meal daily rollup
+
+Revision ID: c5a8d2b6e173
+Revises: b7c2e4f81d06
+Create Date: 2026-10-19 15:26:51.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8d2b6e173'
+down_revision = 'b7c2e4f81d06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('meal_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('school_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('meal_type', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('fruit_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('school_id', 'date', 'meal_type', name='uq_meal_rollup_key')
+    )
+
+    # Backfill from existing distributions
+    op.execute(
+        "INSERT INTO meal_daily_rollups (school_id, date, meal_type, count, quantity, fruit_count) "
+        "SELECT d.school_id, d.date, COALESCE(m.type, 'unspecified'), COUNT(d.id), "
+        "COALESCE(SUM(d.quantity), 0), SUM(CASE WHEN d.is_fruit THEN 1 ELSE 0 END) "
+        "FROM meal_distributions d JOIN meals m ON m.id = d.meal_id "
+        "JOIN students s ON s.id = d.student_id "
+        "WHERE NOT s.deleted "
+        "GROUP BY d.school_id, d.date, COALESCE(m.type, 'unspecified')"
+    )
+
+
+def downgrade():
+    op.drop_table('meal_daily_rollups')
@@ -0,0 +1,26 @@
+"""added count to audit logs
+
+Revision ID: e1b4c7a9d265
+Revises: d3f6a1b8c524
+Create Date: 2026-10-19 18:05:37.441920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b4c7a9d265'
+down_revision = 'd3f6a1b8c524'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('count', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_column('count')
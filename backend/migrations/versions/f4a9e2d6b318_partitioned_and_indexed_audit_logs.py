@@ -0,0 +1,103 @@
+"""partitioned and indexed audit logs
+
+Revision ID: f4a9e2d6b318
+Revises: e1b4c7a9d265
+Create Date: 2026-10-19 18:42:09.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a9e2d6b318'
+down_revision = 'e1b4c7a9d265'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, user_id, action, ip_address, timestamp, count"
+
+# One partition per month from the oldest row through three months ahead;
+# `manage.py audit-partitions` keeps creating them after that
+CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE m date;
+BEGIN
+  FOR m IN
+    SELECT generate_series(
+      date_trunc('month', COALESCE((SELECT min(timestamp) FROM audit_logs_old), now())),
+      date_trunc('month', now()) + interval '3 months',
+      interval '1 month'
+    )::date
+  LOOP
+    EXECUTE format(
+      'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+      'audit_logs_' || to_char(m, '"y"YYYY"m"MM'), m, (m + interval '1 month')::date
+    );
+  END LOOP;
+END $$;
+"""
+
+
+def upgrade():
+    op.execute("UPDATE audit_logs SET timestamp = CURRENT_TIMESTAMP WHERE timestamp IS NULL")
+
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=False)
+            batch_op.create_index('ix_audit_logs_user_timestamp', ['user_id', 'timestamp'], unique=False)
+            batch_op.create_index('ix_audit_logs_action_timestamp', ['action', 'timestamp'], unique=False)
+        return
+
+    # Postgres: rebuild as a table range-partitioned by month. The partition key
+    # has to be part of the primary key, hence (id, timestamp).
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_old")
+    op.execute("ALTER TABLE audit_logs_old RENAME CONSTRAINT audit_logs_pkey TO audit_logs_old_pkey")
+    op.execute(
+        "CREATE TABLE audit_logs ("
+        " id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),"
+        " user_id INTEGER NOT NULL REFERENCES users (id),"
+        " action VARCHAR(255) NOT NULL,"
+        " ip_address VARCHAR(100),"
+        " timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,"
+        " count INTEGER NOT NULL DEFAULT 1,"
+        " CONSTRAINT audit_logs_pkey PRIMARY KEY (id, timestamp)"
+        ") PARTITION BY RANGE (timestamp)"
+    )
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    # Safety net so a missed partition never makes audit writes fail
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_old")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("DROP TABLE audit_logs_old")
+
+    op.create_index('ix_audit_logs_user_timestamp', 'audit_logs', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_audit_logs_action_timestamp', 'audit_logs', ['action', 'timestamp'], unique=False,
+                    postgresql_ops={'action': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+            batch_op.drop_index('ix_audit_logs_action_timestamp')
+            batch_op.drop_index('ix_audit_logs_user_timestamp')
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=True)
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute(
+        "CREATE TABLE audit_logs ("
+        " id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),"
+        " user_id INTEGER NOT NULL REFERENCES users (id),"
+        " action VARCHAR(255) NOT NULL,"
+        " ip_address VARCHAR(100),"
+        " timestamp TIMESTAMP WITHOUT TIME ZONE,"
+        " count INTEGER NOT NULL DEFAULT 1,"
+        " CONSTRAINT audit_logs_pkey PRIMARY KEY (id)"
+        ")"
+    )
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE audit_logs_partitioned")
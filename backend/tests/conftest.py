@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import app modules (utils.*, app.*) the way run.py and manage.py do, from backend/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,165 @@
+"""
+RoutingSession.get_bind against two SQLite files standing in for the primary and
+the read replica, plus a third bind for models that live on their own database.
+The app and models are built here, so only Flask, Flask-SQLAlchemy and
+utils.replica are involved.
+"""
+import pytest
+import sqlalchemy as sa
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from utils.replica import REPLICA_BIND, RoutingSession, use_replica
+
+
+@pytest.fixture
+def env(tmp_path):
+    def url(name):
+        return f"sqlite:///{tmp_path / name}.db"
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url("primary")
+    app.config["SQLALCHEMY_BINDS"] = {REPLICA_BIND: url("replica"), "archive": url("archive")}
+    db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+
+    class School(db.Model):
+        id = sa.Column(sa.Integer, primary_key=True)
+        name = sa.Column(sa.String(50), nullable=False)
+
+    class Note(db.Model):
+        __bind_key__ = "archive"
+        id = sa.Column(sa.Integer, primary_key=True)
+        body = sa.Column(sa.String(50), nullable=False)
+
+    with app.app_context():
+        # The replica holds a copy of the primary's tables, with different data here
+        # so each test can tell which database answered
+        db.create_all()
+        School.metadata.create_all(db.engines[REPLICA_BIND], tables=[School.__table__])
+        with db.engines[None].begin() as conn:
+            conn.execute(sa.insert(School.__table__).values(id=1, name="primary"))
+        with db.engines[REPLICA_BIND].begin() as conn:
+            conn.execute(sa.insert(School.__table__).values(id=1, name="replica"))
+        with db.engines["archive"].begin() as conn:
+            conn.execute(sa.insert(Note.__table__).values(id=1, body="archived"))
+
+    with app.test_request_context("/"):
+        yield app, db, School, Note
+        db.session.remove()
+
+
+def school_name(db, School):
+    return db.session.scalar(sa.select(School.name).where(School.id == 1))
+
+
+def test_reads_go_to_the_replica_inside_use_replica(env):
+    _, db, School, _ = env
+
+    @use_replica
+    def view():
+        return school_name(db, School), db.session.get_bind(clause=sa.select(School))
+
+    name, engine = view()
+    assert name == "replica"
+    assert engine is db.engines[REPLICA_BIND]
+
+
+def test_routes_without_use_replica_stay_on_the_primary(env):
+    _, db, School, _ = env
+
+    assert school_name(db, School) == "primary"
+    assert db.session.get_bind(clause=sa.select(School)) is db.engines[None]
+
+
+def test_replica_flag_is_cleared_after_the_route(env):
+    _, db, School, _ = env
+
+    use_replica(lambda: None)()
+    assert school_name(db, School) == "primary"
+
+
+def test_flush_sends_later_reads_to_the_primary(env):
+    _, db, School, _ = env
+
+    @use_replica
+    def view():
+        before = school_name(db, School)
+        db.session.add(School(id=2, name="new"))
+        db.session.flush()
+        new = db.session.scalar(sa.select(School.name).where(School.id == 2))
+        return before, new, school_name(db, School)
+
+    assert view() == ("replica", "new", "primary")
+    assert db.session.info["wrote_primary"] is True
+
+
+def test_update_statement_goes_to_the_primary_and_sticks(env):
+    _, db, School, _ = env
+
+    @use_replica
+    def view():
+        db.session.execute(sa.update(School).where(School.id == 1).values(name="renamed"))
+        return school_name(db, School)
+
+    assert view() == "renamed"
+    assert db.session.info["wrote_primary"] is True
+    assert db.session.get_bind(clause=sa.update(School)) is db.engines[None]
+
+
+def test_wrote_primary_keeps_reads_on_the_primary(env):
+    _, db, School, _ = env
+    db.session.info["wrote_primary"] = True
+
+    @use_replica
+    def view():
+        return db.session.get_bind(clause=sa.select(School))
+
+    assert view() is db.engines[None]
+
+
+def test_raw_sql_goes_to_the_primary(env):
+    _, db, _, _ = env
+
+    @use_replica
+    def view():
+        return db.session.execute(sa.text("SELECT name FROM school WHERE id = 1")).scalar()
+
+    assert view() == "primary"
+
+
+def test_models_on_another_bind_are_not_rerouted(env):
+    _, db, _, Note = env
+
+    @use_replica
+    def view():
+        return db.session.scalar(sa.select(Note.body)), db.session.get_bind(mapper=Note.__mapper__)
+
+    body, engine = view()
+    assert body == "archived"
+    assert engine is db.engines["archive"]
+    assert "wrote_primary" not in db.session.info
+
+
+def test_explicit_bind_is_respected(env):
+    _, db, School, _ = env
+
+    @use_replica
+    def view():
+        return db.session.get_bind(clause=sa.select(School), bind=db.engines[None])
+
+    assert view() is db.engines[None]
+
+
+def test_without_a_replica_bind_everything_uses_the_primary(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'only'}.db"
+    db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+
+    class School(db.Model):
+        id = sa.Column(sa.Integer, primary_key=True)
+
+    with app.test_request_context("/"):
+        db.create_all()
+        engine = use_replica(lambda: db.session.get_bind(clause=sa.select(School)))()
+        assert engine is db.engines[None]
+        db.session.remove()
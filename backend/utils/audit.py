@@ -1,12 +1,162 @@
 import os
-from datetime import datetime
+import json
+import time
+import fcntl
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+AUDIT_LOG_FILE = os.getenv("AUDIT_LOG_FILE", os.path.join("logs", "audit.log"))
+AUDIT_LOG_MAX_BYTES = int(os.getenv("AUDIT_LOG_MAX_BYTES", 50 * 1024 * 1024))
+AUDIT_LOG_ROTATE_WHEN = os.getenv("AUDIT_LOG_ROTATE_WHEN", "midnight")
+AUDIT_LOG_BACKUP_COUNT = int(os.getenv("AUDIT_LOG_BACKUP_COUNT", 30))
+
+_lock = threading.Lock()
+_listener = None
+_listener_pid = None
+_queue = queue.SimpleQueue()
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, event, user_id, ip, description."""
+
+    def format(self, record):
+        return json.dumps({
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": record.msg,
+            "user_id": getattr(record, "user_id", None),
+            "ip": getattr(record, "ip", None),
+            "description": getattr(record, "description", None),
+        }, default=str)
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rotates on a schedule, and also early when the file passes `max_bytes`.
+
+    Every gunicorn worker has its own handler on the same file, so rollovers are
+    serialised with a lock file: the first process that is due renames the file,
+    and the others notice the new inode (as WatchedFileHandler does) and reopen
+    instead of rotating again.
+    """
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+        # Several size rollovers can fall in one interval; never overwrite an older file
+        self.namer = self._unique_name
+        # Hidden, so it matches neither the rotated-file pattern nor audit-search's glob
+        directory, name = os.path.split(self.baseFilename)
+        self.lock_path = os.path.join(directory, f".{name}.lock")
+
+    @staticmethod
+    def _unique_name(name):
+        candidate, n = name, 0
+        while os.path.exists(candidate):
+            n += 1
+            candidate = f"{name}.{n}"
+        return candidate
+
+    def _rotated_elsewhere(self):
+        """True if the path no longer points at the file this handler has open."""
+        if self.stream is None:
+            return False
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        own = os.fstat(self.stream.fileno())
+        return (on_disk.st_dev, on_disk.st_ino) != (own.st_dev, own.st_ino)
+
+    def _reopen(self):
+        self.stream.close()
+        self.stream = self._open()
+        now = int(time.time())
+        if now >= self.rolloverAt:
+            # The process that rotated has started this interval's file already
+            self.rolloverAt = self.computeRollover(now)
+
+    def emit(self, record):
+        # Called with the handler lock held, from the single writer thread
+        if self._rotated_elsewhere():
+            self._reopen()
+        super().emit(record)
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes and self.stream is not None:
+            # fstat, not tell(): the size includes the other workers' lines
+            return os.fstat(self.stream.fileno()).st_size >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if self._rotated_elsewhere():
+                self._reopen()
+                return
+            super().doRollover()
+
+
+class _AuditQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Leave formatting to the writer thread; audit records carry no args or exc_info
+        return record
+
+
+def _start_listener():
+    """Starts the background writer, once per process (gunicorn workers fork after import)."""
+    global _listener, _listener_pid
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return
+
+        os.makedirs(os.path.dirname(AUDIT_LOG_FILE) or ".", exist_ok=True)
+        file_handler = SizedTimedRotatingFileHandler(
+            AUDIT_LOG_FILE,
+            max_bytes=AUDIT_LOG_MAX_BYTES,
+            when=AUDIT_LOG_ROTATE_WHEN,
+            backupCount=AUDIT_LOG_BACKUP_COUNT,
+            utc=True,
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(JsonLineFormatter())
+
+        _listener = QueueListener(_queue, file_handler)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def _stop_listener():
+    """Drains queued events to disk and closes the file. Registered with atexit."""
+    global _listener
+    with _lock:
+        if _listener is None or _listener_pid != os.getpid():
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+audit_logger = logging.getLogger("audit")
+audit_logger.setLevel(logging.DEBUG)
+audit_logger.propagate = False
+audit_logger.addHandler(_AuditQueueHandler(_queue))
 
-AUDIT_LOG_FILE = os.path.join("logs", "audit.log")
 
 def log_event(event_type, user_id=None, ip=None, description=None, level="INFO", print_to_console=False):
     """
-    Logs a security or audit-related event to a file.
-    
+    Logs a security or audit-related event as a JSON line. The request thread only
+    enqueues the event; a background thread writes and rotates the file.
+
     Parameters:
         event_type (str): The type of the event (e.g., LOGIN_SUCCESS).
         user_id (int|None): The user ID, if available.
@@ -15,16 +165,14 @@ def log_event(event_type, user_id=None, ip=None, description=None, level="INFO",
         level (str): Log level (e.g., INFO, WARNING, ERROR).
         print_to_console (bool): Optionally print to stdout (for debugging/dev).
     """
-    os.makedirs(os.path.dirname(AUDIT_LOG_FILE), exist_ok=True)
+    if _listener_pid != os.getpid():
+        _start_listener()
 
-    timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-    log_entry = (
-        f"[{timestamp}] [{level.upper()}] EVENT: {event_type} | "
-        f"USER: {user_id or 'N/A'} | IP: {ip or 'N/A'} | DESC: {description or 'N/A'}\n"
-    )
+    levelno = logging.getLevelName(level.upper())
+    if not isinstance(levelno, int):
+        levelno = logging.INFO
 
-    with open(AUDIT_LOG_FILE, "a") as log_file:
-        log_file.write(log_entry)
+    audit_logger.log(levelno, event_type, extra={"user_id": user_id, "ip": ip, "description": description})
 
     if print_to_console:
-        print(log_entry.strip())
+        print(f"[{level.upper()}] EVENT: {event_type} | USER: {user_id or 'N/A'} | IP: {ip or 'N/A'} | DESC: {description or 'N/A'}")
@@ -0,0 +1,132 @@
+import re
+from datetime import date
+from sqlalchemy import text
+from app.extensions import db
+from app.models import AuditLog
+
+PARENT = "audit_logs"
+PARTITION_RE = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+
+def _is_postgres():
+    return db.engine.dialect.name == "postgresql"
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def existing_partitions():
+    """Monthly partitions of audit_logs on Postgres: [(first day of month, table name)], oldest first."""
+    rows = db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": PARENT}).scalars()
+
+    partitions = []
+    for name in rows:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def default_partition():
+    """Name of the DEFAULT partition of audit_logs on Postgres, or None."""
+    return db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'"
+    ), {"parent": PARENT}).scalar()
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """
+    Creates the monthly partitions from the current month through `months_ahead`
+    months ahead. Rows for a new month that were written to the default partition
+    (because its partition was missing) are moved into it, since Postgres refuses
+    to create a partition the default partition already holds rows for.
+    No-op outside Postgres. Returns the names created. The caller commits.
+    """
+    if not _is_postgres():
+        return []
+
+    current = (today or date.today()).replace(day=1)
+    have = {name for _, name in existing_partitions()}
+    default = default_partition()
+    if default:
+        # Hold off writes that would land in the default partition (rows with no
+        # monthly partition) until the caller commits, so none slip in mid-move
+        db.session.execute(text(f'LOCK TABLE "{default}" IN EXCLUSIVE MODE'))
+    created = []
+    for n in range(months_ahead + 1):
+        month = _add_months(current, n)
+        name = partition_name(month)
+        if name in have:
+            continue
+        bounds = {"start": month, "end": _add_months(month, 1)}
+        bound_sql = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        stranded = default and db.session.execute(text(
+            f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE timestamp >= :start AND timestamp < :end)'
+        ), bounds).scalar()
+
+        if not stranded:
+            db.session.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT} {bound_sql}'))
+        else:
+            # Build the month as a plain table, move its rows over, then attach it
+            db.session.execute(text(
+                f'CREATE TABLE "{name}" (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            ))
+            db.session.execute(text(
+                f'WITH moved AS (DELETE FROM "{default}" WHERE timestamp >= :start AND timestamp < :end '
+                f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved'
+            ), bounds)
+            db.session.execute(text(f'ALTER TABLE {PARENT} ATTACH PARTITION "{name}" {bound_sql}'))
+        created.append(name)
+    return created
+
+
+def drop_partitions_before(keep_months, today=None, dry_run=False):
+    """
+    Retention: removes audit rows older than `keep_months` whole months.
+    On Postgres, whole partitions are dropped (no DELETE, no table bloat), and
+    old rows that landed in the default partition are deleted from it. On
+    other databases the single table falls back to a DELETE. Returns what was
+    (or would be) removed. The caller commits.
+    """
+    cutoff = _add_months((today or date.today()).replace(day=1), -keep_months)
+
+    if not _is_postgres():
+        query = AuditLog.query.filter(AuditLog.timestamp < cutoff)
+        if dry_run:
+            return [f"{query.count()} rows before {cutoff.isoformat()}"]
+        deleted = query.delete(synchronize_session=False)
+        return [f"{deleted} rows before {cutoff.isoformat()}"]
+
+    dropped = []
+    for month, name in existing_partitions():
+        if month >= cutoff:
+            break
+        if not dry_run:
+            db.session.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}"'))
+            db.session.execute(text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+
+    default = default_partition()
+    if default:
+        where = f'FROM "{default}" WHERE timestamp < :cutoff'
+        if dry_run:
+            count = db.session.execute(text(f"SELECT count(*) {where}"), {"cutoff": cutoff}).scalar()
+        else:
+            count = db.session.execute(text(f"DELETE {where}"), {"cutoff": cutoff}).rowcount
+        if count:
+            dropped.append(f"{count} rows before {cutoff.isoformat()} from {default}")
+    return dropped
@@ -0,0 +1,239 @@
+import os
+import re
+import glob
+import json
+import mmap
+import hashlib
+from datetime import datetime, timedelta
+from utils.audit import AUDIT_LOG_FILE
+
+INDEX_SUFFIX = ".idx"
+# Kept out of the log directory's audit.log.* namespace, where the rotating
+# handler would count them as backups and delete real rotated logs early
+INDEX_DIR = ".audit-index"
+INDEX_VERSION = 1
+HEAD_BYTES = 4096  # fingerprint of a file's start, to notice it was rotated and replaced
+
+# Legacy text lines: [2025-07-01 15:19:55] [INFO] EVENT: X | USER: 5 | IP: 1.2.3.4 | DESC: ...
+LEGACY_RE = re.compile(
+    r"^\[(?P<ts>[^\]]+)\] \[(?P<level>\w+)\] EVENT: (?P<event>.*?) \| USER: (?P<user>.*?) \| "
+    r"IP: (?P<ip>.*?) \| DESC: (?P<desc>.*)$"
+)
+JSON_USER_RE = re.compile(rb'"user_id": (\d+|"[^"]*")')
+LEGACY_USER_RE = re.compile(rb"\| USER: (\S+) \|")
+
+
+def index_path(path):
+    """Where the offset index of a log file lives: logs/.audit-index/<file>.idx"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, INDEX_DIR, name + INDEX_SUFFIX)
+
+
+def prune_indexes(path=AUDIT_LOG_FILE):
+    """Removes indexes of rotated logs that have been deleted, and old <file>.idx sidecars."""
+    directory, name = os.path.split(path)
+    stale = glob.glob(f"{glob.escape(path)}.*{INDEX_SUFFIX}")
+    for index in glob.glob(os.path.join(glob.escape(os.path.join(directory, INDEX_DIR)), "*" + INDEX_SUFFIX)):
+        if not os.path.exists(os.path.join(directory, os.path.basename(index)[:-len(INDEX_SUFFIX)])):
+            stale.append(index)
+    for index in stale:
+        try:
+            os.remove(index)
+        except OSError:
+            pass
+
+
+def log_files(path=AUDIT_LOG_FILE):
+    """The live log and its rotated siblings, oldest first."""
+    rotated = [
+        p for p in glob.glob(f"{glob.escape(path)}.*")
+        if not p.endswith((INDEX_SUFFIX, ".tmp"))
+    ]
+    rotated.sort(key=os.path.getmtime)
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def parse_line(line):
+    """Parses a JSON or legacy text audit line into a dict, or None if it is neither."""
+    line = line.decode("utf-8", errors="replace").rstrip("\r\n")
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+            ts = datetime.fromisoformat(entry["ts"])
+        except (ValueError, KeyError):
+            return None
+        entry["ts"] = ts.replace(tzinfo=None) if ts.tzinfo else ts
+        return entry
+
+    match = LEGACY_RE.match(line)
+    if not match:
+        return None
+    try:
+        ts = datetime.strptime(match["ts"], "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+    def value(v):
+        return None if v == "N/A" else v
+
+    return {
+        "ts": ts,
+        "level": match["level"],
+        "event": match["event"],
+        "user_id": value(match["user"]),
+        "ip": value(match["ip"]),
+        "description": value(match["desc"]),
+    }
+
+
+def _hour_key(line):
+    """'YYYY-MM-DDTHH' from the fixed-position timestamp of either format."""
+    if line.startswith(b'{"ts": "'):
+        return line[8:21].decode()
+    if line.startswith(b"["):
+        return line[1:14].decode().replace(" ", "T")
+    return None
+
+
+def _user_key(line):
+    match = (JSON_USER_RE if line.startswith(b"{") else LEGACY_USER_RE).search(line)
+    if not match:
+        return None
+    user = match[1].decode().strip('"')
+    return None if user in ("null", "N/A") else user
+
+
+def _head_hash(mm):
+    return hashlib.sha1(mm[:HEAD_BYTES]).hexdigest()
+
+
+def _load_index(path, mm):
+    """Loads the sidecar index if it still describes this file's prefix, else an empty one."""
+    try:
+        with open(index_path(path)) as f:
+            index = json.load(f)
+        if (
+            index.get("version") == INDEX_VERSION
+            and index["size"] <= len(mm)
+            and index["head"] == _head_hash(mm[:min(len(mm), index["head_len"])])
+        ):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    return {"version": INDEX_VERSION, "size": 0, "head": None, "head_len": 0, "hours": {}, "users": {}}
+
+
+def build_index(path, mm):
+    """
+    Brings the sidecar index of `path` up to date, scanning only bytes appended
+    since the last run. The index maps every hour to the byte range holding its
+    lines, and every user id to the hours they appear in.
+    """
+    index = _load_index(path, mm)
+    size = len(mm)
+    if index["size"] == size:
+        return index
+
+    hours, users = index["hours"], index["users"]
+    offset = index["size"]
+    mm.seek(offset)
+    while offset < size:
+        line = mm.readline()
+        if not line.endswith(b"\n"):
+            break  # partial line still being written; index it next time
+        end = offset + len(line)
+        hour = _hour_key(line)
+        if hour:
+            span = hours.get(hour)
+            hours[hour] = [min(span[0], offset), max(span[1], end)] if span else [offset, end]
+            user = _user_key(line)
+            if user:
+                user_hours = users.setdefault(user, [])
+                if not user_hours or user_hours[-1] != hour:
+                    user_hours.append(hour)
+        offset = end
+
+    index.update(size=offset, head=_head_hash(mm[:min(size, HEAD_BYTES)]), head_len=min(size, HEAD_BYTES))
+    target = index_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, target)
+    return index
+
+
+def _ranges(index, start, end, user_id):
+    """Merged byte ranges of the hours that can hold matching lines."""
+    hours = index["hours"]
+    keys = set(index["users"].get(str(user_id), [])) if user_id is not None else hours.keys()
+    start_key = start.strftime("%Y-%m-%dT%H") if start else None
+    end_key = end.strftime("%Y-%m-%dT%H") if end else None
+
+    spans = sorted(
+        hours[key] for key in keys
+        if key in hours and (not start_key or key >= start_key) and (not end_key or key <= end_key)
+    )
+    merged = []
+    for lo, hi in spans:
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def _candidate_lines(mm, lo, hi, needle):
+    """Lines in [lo, hi); with a needle, only lines containing it (found with mmap.find)."""
+    if not needle:
+        mm.seek(lo)
+        while mm.tell() < hi:
+            yield mm.readline()
+        return
+
+    pos = mm.find(needle, lo, hi)
+    while pos != -1:
+        line_start = mm.rfind(b"\n", lo, pos) + 1 or lo
+        line_end = mm.find(b"\n", pos, hi)
+        line_end = hi if line_end == -1 else line_end + 1
+        yield mm[line_start:line_end]
+        pos = mm.find(needle, line_end, hi)
+
+
+def search(event=None, user_id=None, ip=None, start=None, end=None, path=AUDIT_LOG_FILE):
+    """
+    Yields parsed audit entries matching every given filter, oldest first.
+    `event` matches as a prefix (LOGIN matches LOGIN_FAILED); start/end are naive UTC.
+    Only the hours in range (and, with user_id, the hours that user appears in)
+    are read, and within them only lines containing the IP or event text.
+    """
+    needle = (ip or event or "").encode() or None
+    prune_indexes(path)
+    for file_path in log_files(path):
+        if os.path.getsize(file_path) == 0:
+            continue
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            index = build_index(file_path, mm)
+            for lo, hi in _ranges(index, start, end, user_id):
+                for line in _candidate_lines(mm, lo, hi, needle):
+                    entry = parse_line(line)
+                    if not entry:
+                        continue
+                    if start and entry["ts"] < start or end and entry["ts"] > end:
+                        continue
+                    if event and not (entry.get("event") or "").startswith(event):
+                        continue
+                    if ip and entry.get("ip") != ip:
+                        continue
+                    if user_id is not None and str(entry.get("user_id")) != str(user_id):
+                        continue
+                    yield entry
+
+
+def parse_since(value):
+    """'7d', '12h' or '30m' -> start datetime (UTC)."""
+    match = re.fullmatch(r"(\d+)([dhm])", value or "")
+    if not match:
+        raise ValueError("Use a number followed by d, h or m, e.g. 7d")
+    unit = {"d": "days", "h": "hours", "m": "minutes"}[match[2]]
+    return datetime.utcnow() - timedelta(**{unit: int(match[1])})
@@ -87,6 +87,20 @@ def role_and_school_required(*allowed_roles):
         return wrapper
     return decorator
 
+def session_role_error(user, student):
+    """
+    Why `user` may not record for `student` given the student's type, or None if they may.
+    Used by session_role_required and by batch endpoints that check each student.
+    """
+    user_role = user.role.name.lower()
+    if student.physical_education:
+        if user_role not in {"head_coach", "admin", "superuser"}:
+            return "Only head coaches, admins, or superusers can record PE sessions"
+    elif user_role not in {"head_tutor", "admin", "superuser"}:
+        return "Only head tutors, admins, or superusers can record academic sessions"
+    return None
+
+
 def session_role_required():
     """
     Restricts access to recording academic vs PE sessions.
@@ -120,13 +134,9 @@ def session_role_required():
                 return jsonify({"error": "Access denied to this school"}), 403
 
             # Role check based on student type
-            user_role = user.role.name.lower()
-            if student.physical_education:
-                if user_role not in {"head_coach", "admin", "superuser"}:
-                    return jsonify({"error": "Only head coaches, admins, or superusers can record PE sessions"}), 403
-            else:
-                if user_role not in {"head_tutor", "admin", "superuser"}:
-                    return jsonify({"error": "Only head tutors, admins, or superusers can record academic sessions"}), 403
+            error = session_role_error(user, student)
+            if error:
+                return jsonify({"error": error}), 403
 
             return fn(*args, **kwargs)
         return wrapper
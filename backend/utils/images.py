@@ -0,0 +1,142 @@
+import os
+import re
+import logging
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each derivative
+VARIANTS = {
+    "thumb": 160,
+    "medium": 800,
+}
+FORMATS = {
+    "webp": "WEBP",
+    "jpg": "JPEG",
+}
+DEFAULT_FORMAT = "webp"
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif"}
+FILES_URL_PREFIX = "/upload/files"
+
+# Originals written by utils.storage: ab/cd/<sha256>.<ext>
+STORED_KEY_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$")
+
+_executor = None
+
+
+def stored_key(path):
+    """Key of a stored original relative to UPLOAD_FOLDER, or None for legacy/foreign paths."""
+    if not path:
+        return None
+    key = path.replace('\\', '/').rsplit('/', 3)[-3:]
+    key = '/'.join(key)
+    return key if STORED_KEY_RE.match(key) else None
+
+
+def is_image(key):
+    return key.rsplit('.', 1)[-1] in IMAGE_EXTENSIONS
+
+
+def derivative_key(key, variant, fmt=DEFAULT_FORMAT):
+    """ab/cd/<sha256>.png -> ab/cd/<sha256>.thumb.webp"""
+    return f"{key.rsplit('.', 1)[0]}.{variant}.{fmt}"
+
+
+def variant_urls(path):
+    """
+    URLs for the original and each derivative of a stored image, for API responses.
+    Returns None for files that are not images in the content-addressed store.
+    """
+    key = stored_key(path)
+    if not key or not is_image(key):
+        return None
+
+    urls = {"original": f"{FILES_URL_PREFIX}/{key}"}
+    for variant in VARIANTS:
+        urls[variant] = f"{FILES_URL_PREFIX}/{key}?variant={variant}"
+    return urls
+
+
+def render_derivative(root, key, variant, fmt=DEFAULT_FORMAT):
+    """
+    Writes one resized, EXIF-stripped derivative next to the original and returns
+    its key. Runs in worker processes, so it only touches the filesystem.
+    """
+    from PIL import Image, ImageOps  # only needed where derivatives are rendered
+
+    target_key = derivative_key(key, variant, fmt)
+    target = os.path.join(root, target_key)
+    if os.path.exists(target):
+        return target_key
+
+    size = VARIANTS[variant]
+    with Image.open(os.path.join(root, key)) as img:
+        # Bake the EXIF orientation into the pixels; the EXIF block itself is not copied over
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGB")
+        img.thumbnail((size, size))
+
+        # A unique temp file per render: threads of one worker can render the same derivative
+        tmp_dir = os.path.join(root, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            try:
+                img.save(tmp, FORMATS[fmt], quality=80)
+            except Exception:
+                tmp.close()
+                os.remove(tmp.name)
+                raise
+    os.replace(tmp.name, target)
+    return target_key
+
+
+def render_all(root, key):
+    for variant in VARIANTS:
+        render_derivative(root, key, variant)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Not forked: a forked child would inherit the gunicorn worker's threads,
+        # locks and open database connections mid-use
+        _executor = ProcessPoolExecutor(
+            max_workers=current_app.config.get("IMAGE_WORKERS", 2),
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _executor
+
+
+def _log_failure(future):
+    if future.exception():
+        logger.warning("Derivative generation failed: %s", future.exception())
+
+
+def schedule_derivatives(keys):
+    """Queues derivative generation for stored originals in the process pool."""
+    root = os.path.abspath(current_app.config.get('UPLOAD_FOLDER', 'static/uploads'))
+    for key in keys:
+        _get_executor().submit(render_all, root, key).add_done_callback(_log_failure)
+
+
+def queue_after_commit(session, key):
+    """Generates derivatives for `key` once the session that stored it commits."""
+    if is_image(key):
+        session.info.setdefault("pending_derivatives", set()).add(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_pending(session):
+    keys = session.info.pop("pending_derivatives", None)
+    if keys:
+        schedule_derivatives(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop("pending_derivatives", None)
@@ -1,29 +1,132 @@
-from flask import request, jsonify
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+import os
+import time
+import atexit
+import logging
+import threading
+from flask import request, jsonify, current_app
+from utils.rate_limits import rate_limit_identity
 from datetime import datetime
 # from app.models import AuditLog, User, db
 
+logger = logging.getLogger(__name__)
+
+BREACH_WINDOW_SECONDS = int(os.getenv("BREACH_WINDOW_SECONDS", 60))
+BREACH_MAX_PENDING = 10000  # distinct (user, route, window) keys held between flushes
+
+
+class BreachAggregator:
+    """
+    Counts rate-limit breaches in memory per (user, route, window) and writes them
+    as one AuditLog row per key from a background thread, so a rejected request
+    never waits on the database. Windows are aligned to multiples of `window`
+    seconds and only written once they have closed, so a window's breaches land
+    in a single row (per worker process) stamped with the window start.
+    """
+
+    def __init__(self, window=BREACH_WINDOW_SECONDS, max_pending=BREACH_MAX_PENDING):
+        self.window = window
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._dropped = 0
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def record(self, user_id, action, ip):
+        window_start = int(time.time() // self.window * self.window)
+        key = (user_id, action, window_start)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry:
+                entry["count"] += 1
+                entry["ip_address"] = ip
+            elif len(self._pending) < self.max_pending:
+                self._pending[key] = {"count": 1, "ip_address": ip}
+            else:
+                self._dropped += 1
+
+        if self._pid != os.getpid():
+            self._start(current_app._get_current_object())
+
+    def _start(self, app):
+        # Once per process; gunicorn workers fork after import
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._app = app
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="breach-flusher", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        # Wake just after each window boundary, when the previous window has closed
+        while not self._stop.wait(self.window - time.time() % self.window + 1):
+            self.flush()
+
+    def flush(self, closed_only=True):
+        """
+        Writes pending counts in one batch: those of windows that have closed, or
+        all of them with closed_only=False (at shutdown). Failures are logged, never raised.
+        """
+        current = int(time.time() // self.window * self.window)
+        with self._lock:
+            if closed_only:
+                pending = {key: entry for key, entry in self._pending.items() if key[2] < current}
+                for key in pending:
+                    del self._pending[key]
+            else:
+                pending, self._pending = self._pending, {}
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning("Dropped %s rate-limit breach events: too many distinct keys", dropped)
+        if not pending or self._app is None:
+            return
+
+        from app.extensions import db
+        from app.models import AuditLog
+
+        rows = [
+            {
+                "user_id": user_id,
+                "action": action,
+                "ip_address": entry["ip_address"],
+                "timestamp": datetime.utcfromtimestamp(window_start),
+                "count": entry["count"],
+            }
+            for (user_id, action, window_start), entry in pending.items()
+        ]
+        try:
+            with self._app.app_context():
+                db.session.execute(AuditLog.__table__.insert(), rows)
+                db.session.commit()
+        except Exception:
+            logger.exception("Could not write %s rate-limit breach rows", len(rows))
+
+    def stop(self):
+        if self._pid == os.getpid():
+            self._stop.set()
+            self.flush(closed_only=False)
+
+
+breach_aggregator = BreachAggregator()
+atexit.register(breach_aggregator.stop)
+
+
 def log_rate_limit_violation(limit):
-    from app.extensions import db
-    from app.models import AuditLog, User
-    try:
-        verify_jwt_in_request(optional=True)
-        user_id = get_jwt_identity()
-        if user_id is None:
-            return jsonify({"error":"Rate limit exceeded"}), 429
-    except Exception:
+    # The limiter already decoded the access token for the key; no second verification
+    user_id = rate_limit_identity()
+    if user_id is None:
         return jsonify({"error":"Rate limit exceeded"}), 429
 
-    log = AuditLog(
+    breach_aggregator.record(
         user_id=user_id,
         action=f"RATE_LIMIT_EXCEEDED: {request.method} {request.path}",
-        ip_address=request.remote_addr,
-        timestamp=datetime.utcnow(),
+        ip=request.remote_addr,
     )
-    db.session.add(log)
-    db.session.commit()
 
     return jsonify({
         "error": "Rate limit exceeded. Please slow down."
     }), 429
-
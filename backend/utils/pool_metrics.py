@@ -0,0 +1,191 @@
+import os
+import time
+import threading
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)  # seconds waiting for a connection
+AGE_BUCKETS = (60, 300, 900, 1800, 3600, 4 * 3600)  # seconds since the connection was opened
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(le, count)] as Prometheus expects, ending with +Inf."""
+        total, out = 0, []
+        for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class PoolStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.age = Histogram(AGE_BUCKETS)
+        self.timeouts = 0
+        self.overflow_checkouts = 0  # checkouts that needed a connection beyond pool_size
+        self.peak_overflow = 0
+        self.connects = 0
+        self.invalidations = 0
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection,
+    whether it was served from overflow, how old the connection was and how often
+    connections were opened or invalidated (e.g. by pre-ping after a Postgres
+    restart). Read through `pool_snapshot()`; the numbers are per process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._nested = threading.local()
+        # recreate() (engine.dispose()) passes the old listeners along in _dispatch,
+        # and hands over the stats they write to
+        if kwargs.get("_dispatch") is None:
+            self.stats = PoolStats()
+            _listen(self, self.stats)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; time only the outer call
+        if getattr(self._nested, "active", False):
+            return super()._do_get()
+
+        self._nested.active = True
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            with self.stats.lock:
+                self.stats.timeouts += 1
+            raise
+        finally:
+            self._nested.active = False
+
+        waited = time.perf_counter() - start
+        overflow = self.overflow()
+        with self.stats.lock:
+            self.stats.wait.observe(waited)
+            if overflow > 0:
+                self.stats.overflow_checkouts += 1
+                self.stats.peak_overflow = max(self.stats.peak_overflow, overflow)
+        return record
+
+
+def _listen(pool, stats):
+    # Closures over `stats` only, so copied listeners don't keep old pools alive
+    def on_connect(dbapi_connection, connection_record):
+        with stats.lock:
+            stats.connects += 1
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with stats.lock:
+            stats.age.observe(time.time() - connection_record.starttime)
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with stats.lock:
+            stats.invalidations += 1
+
+    event.listen(pool, "connect", on_connect)
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "invalidate", on_invalidate)
+
+
+def pool_snapshot(engine):
+    """Current gauges and counters of an engine's pool, or None if it isn't instrumented."""
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return None
+    with pool.stats.lock:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeouts": pool.stats.timeouts,
+            "overflow_checkouts": pool.stats.overflow_checkouts,
+            "peak_overflow": pool.stats.peak_overflow,
+            "connects": pool.stats.connects,
+            "invalidations": pool.stats.invalidations,
+            "wait": pool.stats.wait.cumulative(),
+            "wait_sum": pool.stats.wait.sum,
+            "wait_count": pool.stats.wait.count,
+            "age": pool.stats.age.cumulative(),
+            "age_sum": pool.stats.age.sum,
+            "age_count": pool.stats.age.count,
+        }
+
+
+def prometheus_text(engines):
+    """Prometheus exposition of the pools in {bind name: engine}, labelled with the worker pid."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    snapshots = {bind: pool_snapshot(engine) for bind, engine in engines.items()}
+    snapshots = {bind: snap for bind, snap in snapshots.items() if snap}
+    pid = os.getpid()
+
+    def labels(bind, **extra):
+        pairs = {"bind": bind, "pid": pid, **extra}
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs.items()) + "}"
+
+    gauges = [
+        ("db_pool_size", "size", "Configured pool size"),
+        ("db_pool_checked_out", "checked_out", "Connections currently in use"),
+        ("db_pool_checked_in", "checked_in", "Idle connections in the pool"),
+        ("db_pool_overflow", "overflow", "Connections open beyond pool_size"),
+        ("db_pool_max_overflow", "max_overflow", "Configured max_overflow"),
+        ("db_pool_peak_overflow", "peak_overflow", "Highest overflow seen since the pool was created"),
+    ]
+    for name, key, help_text in gauges:
+        metric(name, "gauge", help_text, [f"{name}{labels(b)} {s[key]}" for b, s in snapshots.items()])
+
+    counters = [
+        ("db_pool_checkout_timeouts_total", "timeouts", "Checkouts that gave up after pool_timeout"),
+        ("db_pool_overflow_checkouts_total", "overflow_checkouts", "Checkouts served while in overflow"),
+        ("db_pool_connects_total", "connects", "DBAPI connections opened"),
+        ("db_pool_invalidations_total", "invalidations", "Connections discarded as broken or stale"),
+    ]
+    for name, key, help_text in counters:
+        metric(name, "counter", help_text, [f"{name}{labels(b)} {s[key]}" for b, s in snapshots.items()])
+
+    for name, key, help_text in (
+        ("db_pool_checkout_wait_seconds", "wait", "Time spent waiting for a pooled connection"),
+        ("db_pool_connection_age_seconds", "age", "Age of connections when checked out"),
+    ):
+        samples = []
+        for bind, snap in snapshots.items():
+            samples += [f"{name}_bucket{labels(bind, le=le)} {n}" for le, n in snap[key]]
+            samples.append(f"{name}_sum{labels(bind)} {snap[key + '_sum']:.6f}")
+            samples.append(f"{name}_count{labels(bind)} {snap[key + '_count']}")
+        metric(name, "histogram", help_text, samples)
+
+    return "\n".join(lines) + "\n"
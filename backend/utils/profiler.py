@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import uuid
+import cProfile
+import threading
+from datetime import datetime
+from flask import g, request
+from flask_jwt_extended import verify_jwt_in_request
+from utils.decorators import role_required
+
+PROFILE_HEADER = "X-Profile"  # or ?_profile=; value "cprofile" or "sample"
+MODES = {"cprofile": ".prof", "sample": ".speedscope.json"}
+
+
+class StackSampler:
+    """
+    Samples one thread's stack every `interval` seconds from a helper thread.
+    The profiled request runs at full speed (no per-call hooks as with cProfile),
+    which is what makes it reasonable to use in production.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []  # (frame keys root -> leaf, seconds since the previous sample)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            self.samples.append((tuple(reversed(stack)), now - last))
+            last = now
+
+    def speedscope(self, name):
+        """The samples in speedscope's file format (https://www.speedscope.app)."""
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, seconds in self.samples:
+            ids = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                ids.append(index[key])
+            samples.append(ids)
+            weights.append(round(seconds * 1000, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "stack sampler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+def profile_dir(app):
+    return os.path.abspath(app.config["PROFILE_DIR"])
+
+
+def list_profiles(app):
+    """Stored profiles, newest first."""
+    directory = profile_dir(app)
+    if not os.path.isdir(directory):
+        return []
+    entries = [
+        entry for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(tuple(MODES.values()))
+    ]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return entries
+
+
+def _requested_mode():
+    mode = request.headers.get(PROFILE_HEADER) or (request.args.get("_profile") if request.query_string else None)
+    return mode.lower() if mode and mode.lower() in MODES else None
+
+
+def _is_superuser():
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False
+    # Same check the superuser-only routes use; returns an error response otherwise
+    return role_required("superuser")(lambda: True)() is True
+
+
+def _prune(app):
+    for entry in list_profiles(app)[app.config["PROFILE_MAX_FILES"]:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def init_profiler(app):
+    """
+    Profiles a request when a superuser sends `X-Profile: cprofile|sample` (or
+    ?_profile=...). cprofile records every call (pstats file, e.g. for snakeviz);
+    sample takes a stack every PROFILE_SAMPLE_INTERVAL_MS (speedscope JSON) and is
+    cheap enough for production. The file name comes back in X-Profile-Id and
+    the files are listed under /profiles. Requests without the flag only pay
+    for the header check.
+    """
+
+    @app.before_request
+    def _start_profiler():
+        mode = _requested_mode()
+        if not mode or not _is_superuser():
+            return
+        if mode == "cprofile":
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+        else:
+            g.profiler = StackSampler(threading.get_ident(), app.config["PROFILE_SAMPLE_INTERVAL_MS"] / 1000)
+            g.profiler.start()
+        g.profile_mode = mode
+
+    @app.after_request
+    def _save_profile(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+
+        mode = g.pop("profile_mode")
+        name = "{}-{}-{}-{}{}".format(
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S"),
+            request.method,
+            (request.endpoint or "unknown").replace(".", "_"),
+            uuid.uuid4().hex[:8],
+            MODES[mode],
+        )
+        directory = profile_dir(app)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+
+        if mode == "cprofile":
+            profiler.disable()
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            with open(path, "w") as f:
+                json.dump(profiler.speedscope(f"{request.method} {request.full_path}"), f)
+
+        _prune(app)
+        response.headers["X-Profile-Id"] = name
+        return response
+
+    @app.teardown_request
+    def _stop_unsaved_profiler(exc):
+        # after_request was skipped; never leave cProfile hooked into a worker thread
+        profiler = g.pop("profiler", None)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        elif profiler is not None:
+            profiler.stop()
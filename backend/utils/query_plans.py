@@ -0,0 +1,84 @@
+import json
+from datetime import date
+from sqlalchemy import select, text
+from app.extensions import db
+from app.models import (
+    Student, Worker, User, AcademicSession, PESession, Assessment,
+    MealDistribution, MealDailyRollup, AttendanceRecord, AttendanceDailyRollup
+)
+
+SAMPLE_ID = 1
+SAMPLE_START = date(2025, 1, 1)
+SAMPLE_END = date(2025, 3, 31)
+
+# Query shapes used by the hot endpoints: name -> (table that must be index-scanned, statement)
+HOT_QUERIES = {
+    "students.list": ("students", lambda: select(Student).where(
+        Student.deleted == False, Student.school_id.in_([SAMPLE_ID]))),
+    "workers.list": ("workers", lambda: select(Worker).where(
+        Worker.deleted == False, Worker.school_id.in_([SAMPLE_ID]))),
+    "users.by_school": ("users", lambda: select(User).where(
+        User.deleted == False, User.school_id == SAMPLE_ID)),
+    "sessions.list.academic": ("academic_sessions", lambda: select(AcademicSession).where(
+        AcademicSession.student_id == SAMPLE_ID).order_by(AcademicSession.date.desc())),
+    "sessions.list.pe": ("pe_sessions", lambda: select(PESession).where(
+        PESession.student_id == SAMPLE_ID).order_by(PESession.date.desc())),
+    "assessments.by_student": ("assessments", lambda: select(Assessment).where(
+        Assessment.student_id == SAMPLE_ID)),
+    "mealstats.by_school": ("meal_distributions", lambda: select(MealDistribution).where(
+        MealDistribution.school_id.in_([SAMPLE_ID]),
+        MealDistribution.date.between(SAMPLE_START, SAMPLE_END))),
+    "mealstats.rollup": ("meal_daily_rollups", lambda: select(MealDailyRollup).where(
+        MealDailyRollup.school_id.in_([SAMPLE_ID]),
+        MealDailyRollup.date.between(SAMPLE_START, SAMPLE_END))),
+    "mealstats.student": ("meal_distributions", lambda: select(MealDistribution).where(
+        MealDistribution.student_id == SAMPLE_ID).order_by(MealDistribution.date.desc())),
+    "attendance.student": ("attendance_records", lambda: select(AttendanceRecord).where(
+        AttendanceRecord.student_id == SAMPLE_ID).order_by(AttendanceRecord.date.desc())),
+    "attendance.mark": ("attendance_records", lambda: select(AttendanceRecord).where(
+        AttendanceRecord.student_id.in_([SAMPLE_ID]), AttendanceRecord.date == SAMPLE_START)),
+    "attendance.by_school": ("attendance_records", lambda: select(AttendanceRecord).where(
+        AttendanceRecord.school_id == SAMPLE_ID,
+        AttendanceRecord.date.between(SAMPLE_START, SAMPLE_END))),
+    "attendance.stats": ("attendance_daily_rollups", lambda: select(AttendanceDailyRollup).where(
+        AttendanceDailyRollup.school_id.in_([SAMPLE_ID]),
+        AttendanceDailyRollup.date.between(SAMPLE_START, SAMPLE_END))),
+}
+
+
+def explain(name):
+    """
+    Runs EXPLAIN for one of HOT_QUERIES and reports whether its table is read through an index.
+    On Postgres sequential scans are disabled for the check, so the result reflects whether
+    a usable index exists rather than the planner's choice on a small dev table.
+
+    Returns:
+        (bool, str): whether an index is used, and the plan as text.
+    """
+    table, build = HOT_QUERIES[name]
+    connection = db.session.connection()
+    dialect = connection.dialect
+    sql = str(build().compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+    if dialect.name == "postgresql":
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nodes = list(_walk_plan(plan[0]["Plan"]))
+        seq_scan = any(n["Node Type"] == "Seq Scan" and n.get("Relation Name") == table for n in nodes)
+        uses_index = any("Index Name" in n for n in nodes)
+        db.session.rollback()
+        return uses_index and not seq_scan, json.dumps(plan, indent=2)
+
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    details = [row[-1] for row in rows]
+    scans = [d for d in details if d.split(" ")[1:2] == [table]]
+    uses_index = bool(scans) and all("USING" in d and "INDEX" in d for d in scans)
+    return uses_index, "\n".join(details)
+
+
+def _walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
@@ -0,0 +1,143 @@
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Collectors receiving the queries run in the current context (a request, a test block)
+_active = ContextVar("query_stats_collectors", default=())
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = {}  # SQL text -> [executions, total seconds, slowest seconds]
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        entry = self.statements.setdefault(statement, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+        entry[2] = max(entry[2], duration)
+
+    def slowest(self, n=3):
+        """[(statement, slowest seconds)] of the n slowest distinct statements."""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][2], reverse=True)
+        return [(statement, entry[2]) for statement, entry in ranked[:n]]
+
+    def repeated(self, threshold):
+        """
+        [(statement, executions)] for statements run at least `threshold` times.
+        The same SQL with different parameters over and over is the N+1 pattern:
+        a query per row of an earlier result instead of one joined or IN query.
+        """
+        hits = [(statement, entry[0]) for statement, entry in self.statements.items() if entry[0] >= threshold]
+        return sorted(hits, key=lambda item: item[1], reverse=True)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active.get()
+    started = conn.info.get("query_started")
+    if not collectors or not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    for stats in collectors:
+        stats.record(statement, duration)
+
+
+@contextmanager
+def collect_queries():
+    """
+    Counts and times the SQL run inside the block, including inside Flask test
+    client requests made from it.
+
+        with collect_queries() as stats:
+            client.get("/students/list")
+        assert stats.count <= 5
+    """
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold=5, max_queries=None):
+    """
+    Fails (AssertionError, so pytest reports it) if any statement ran `threshold`
+    or more times inside the block, or if more than `max_queries` ran in total.
+    """
+    with collect_queries() as stats:
+        yield stats
+    problems = [f"{count}x {_shorten(statement)}" for statement, count in stats.repeated(threshold)]
+    if max_queries is not None and stats.count > max_queries:
+        problems.insert(0, f"{stats.count} queries, expected at most {max_queries}")
+    if problems:
+        raise AssertionError("Possible N+1 queries:\n  " + "\n  ".join(problems))
+
+
+def _shorten(statement, length=200):
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+
+def init_query_stats(app):
+    """
+    Per-request query counting: adds a Server-Timing header (db time, query count,
+    remaining app time) and logs requests over SLOW_REQUEST_MS or
+    SLOW_REQUEST_QUERIES with their slowest and most repeated statements.
+    """
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = QueryStats()
+        g.query_stats_started = time.perf_counter()
+        g.query_stats_token = _active.set(_active.get() + (g.query_stats,))
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.get("query_stats")
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - g.query_stats_started) * 1000
+        db_ms = stats.duration * 1000
+
+        if app.config["SERVER_TIMING"]:
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={db_ms:.1f}, db-count;desc="{stats.count}", app;dur={total_ms - db_ms:.1f}',
+            )
+
+        repeated = stats.repeated(app.config["N_PLUS_ONE_THRESHOLD"])
+        if total_ms >= app.config["SLOW_REQUEST_MS"] or stats.count >= app.config["SLOW_REQUEST_QUERIES"] or repeated:
+            logger.warning(
+                "%s %s %s took %.0f ms with %d queries (%.0f ms in the database)\n  slowest: %s%s",
+                request.method, request.path, response.status_code, total_ms, stats.count, db_ms,
+                "\n           ".join(f"{seconds * 1000:.1f} ms {_shorten(sql)}" for sql, seconds in stats.slowest()),
+                "".join(f"\n  repeated {count}x (N+1?): {_shorten(sql)}" for sql, count in repeated),
+            )
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc):
+        token = g.pop("query_stats_token", None)
+        if token is not None:
+            try:
+                _active.reset(token)
+            except ValueError:
+                pass  # reset from a different context (streamed response); collector just goes stale
@@ -0,0 +1,50 @@
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from flask_limiter.util import get_remote_address
+from jwt.exceptions import PyJWTError
+
+
+def _access_claims():
+    """
+    Claims of the request's access token cookie, or {} if it is missing or invalid.
+    Only the signature and expiry are checked (no blocklist query): this picks the
+    rate limit bucket, and @jwt_required still rejects revoked tokens afterwards.
+    """
+    # Cached per request (the key and each callable limit ask for it)
+    if "rate_limit.claims" not in request.environ:
+        token = request.cookies.get(current_app.config["JWT_ACCESS_COOKIE_NAME"])
+        try:
+            claims = decode_token(token) if token else {}
+        except (PyJWTError, ValueError, KeyError):
+            claims = {}
+        request.environ["rate_limit.claims"] = claims
+    return request.environ["rate_limit.claims"]
+
+
+def rate_limit_identity():
+    """User id from the request's access token (as cached for the limiter), or None."""
+    return _access_claims().get("sub")
+
+
+def rate_limit_key():
+    """
+    Limiter key: the signed-in user (and their school) when a valid access token is
+    present, the client IP otherwise. Staff of one school share a NAT address, so
+    keying on IP throttled the whole site together.
+    """
+    claims = _access_claims()
+    if claims.get("sub"):
+        return f"school:{claims.get('school_id')}:user:{claims['sub']}"
+    return get_remote_address()
+
+
+def role_limit(tier, default):
+    """
+    Callable limit for @limiter.limit: the limit configured for the caller's role in
+    RATELIMIT_ROLE_TIERS[tier], or `default` for other roles and anonymous callers.
+    Usage: @limiter.limit(role_limit("writes", "10 per minute"))
+    """
+    def limit():
+        role = _access_claims().get("role")
+        return current_app.config["RATELIMIT_ROLE_TIERS"].get(tier, {}).get(role, default)
+    return limit
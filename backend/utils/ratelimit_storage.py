@@ -0,0 +1,265 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from limits.storage import Storage, RedisStorage
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    __slots__ = ("expires_at", "expiry", "base", "pending", "inflight", "syncing", "budget")
+
+    def __init__(self, expires_at, expiry, budget):
+        self.expires_at = expires_at
+        self.expiry = expiry
+        self.base = 0      # window total last reported by Redis (all workers)
+        self.pending = 0   # hits admitted here and not yet sent to Redis
+        self.inflight = 0  # hits taken out of pending by the sync that is running
+        self.syncing = False
+        self.budget = budget
+
+    def count(self):
+        return self.base + self.inflight + self.pending
+
+
+class LocalFirstRedisStorage(Storage):
+    """
+    Fixed-window storage that counts hits in process and reconciles with Redis in
+    batches, so most requests never wait on a Redis round trip.
+
+    Every `sync_interval` seconds a background thread sends the pending counts of
+    all keys in one pipeline and takes back the global totals. A key also syncs
+    inline once it has `local_fraction` of its limit unsent, which bounds
+    over-admission to about workers x local_fraction x limit per window.
+
+    Keys for `strict_endpoints` (e.g. auth.login) go straight to Redis. If Redis
+    is slow or down, counting falls back to the local buckets, so limits still
+    apply per worker and the pending hits are sent once Redis answers again.
+    After a failure Redis is left alone for a backoff that doubles up to
+    `max_backoff` seconds; only the background thread probes it meanwhile.
+
+    URI: localfirst+redis://host:port/db (any redis:// form, prefixed).
+    """
+
+    STORAGE_SCHEME = ["localfirst+redis", "localfirst+rediss", "localfirst+redis+unix"]
+
+    def __init__(
+        self,
+        uri,
+        sync_interval=1.0,
+        local_fraction=0.05,
+        strict_endpoints=(),
+        max_backoff=30.0,
+        wrap_exceptions=False,
+        **options,
+    ):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+        # Short timeouts: a stalled Redis must not stall requests that sync inline
+        options.setdefault("socket_timeout", 0.1)
+        options.setdefault("socket_connect_timeout", 0.1)
+        self.remote = RedisStorage(uri.split("+", 1)[1], **options)
+        self.sync_interval = float(sync_interval)
+        self.local_fraction = float(local_fraction)
+        self.strict_endpoints = set(strict_endpoints)
+        self.max_backoff = float(max_backoff)
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._pid = None
+        self._stop = threading.Event()
+        self._last_error_log = 0.0
+        self._backoff = 0.0
+        self._remote_down_until = 0.0
+        atexit.register(self._shutdown)
+
+    @property
+    def base_exceptions(self):
+        return self.remote.base_exceptions
+
+    # Keys look like LIMITER/<identity>/<endpoint>/<amount>/<multiples>/<granularity>
+    @staticmethod
+    def _key_parts(key):
+        parts = key.rsplit("/", 4)
+        return parts if len(parts) == 5 else None
+
+    def _is_strict(self, key):
+        parts = self._key_parts(key)
+        return bool(parts and parts[1] in self.strict_endpoints)
+
+    def _budget(self, key):
+        parts = self._key_parts(key)
+        try:
+            return max(1, int(int(parts[2]) * self.local_fraction))
+        except (TypeError, ValueError):
+            return 1
+
+    def _remote_up(self):
+        return time.time() >= self._remote_down_until
+
+    def _remote_ok(self):
+        self._backoff = 0.0
+
+    def _remote_failed(self, error):
+        now = time.time()
+        # Requests stop calling Redis until the backoff is over instead of each
+        # waiting out its own socket timeout
+        self._backoff = min(self.max_backoff, max(self.sync_interval, self._backoff * 2))
+        self._remote_down_until = now + self._backoff
+        if now - self._last_error_log > 60:
+            self._last_error_log = now
+            logger.warning("Rate limit Redis unavailable, counting locally: %s", error)
+
+    def _ensure_syncer(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked worker inherits the parent's buckets but not its thread
+            self._buckets = {}
+            self._stop = threading.Event()
+            threading.Thread(target=self._run, name="ratelimit-sync", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            self.sync(probe=True)
+
+    def _shutdown(self):
+        if self._pid == os.getpid():
+            self._stop.set()
+            self.sync(probe=True)
+
+    def sync(self, keys=None, probe=False):
+        """
+        Sends pending hits for `keys` (default: every live bucket) to Redis in one
+        pipeline and refreshes the buckets with the global totals, so a worker
+        also sees the hits the other workers admitted. While Redis is backing
+        off only a `probe` (the background thread) tries it.
+        """
+        if not probe and not self._remote_up():
+            return
+        now = time.time()
+        with self._lock:
+            # A bucket's pending hits move to inflight under the lock, so a sync
+            # running at the same time (background or inline) can't send them again
+            batch = []
+            for key, bucket in self._buckets.items():
+                if bucket.syncing or (keys is not None and key not in keys):
+                    continue
+                if bucket.pending or bucket.expires_at > now:
+                    flushed = bucket.pending
+                    bucket.pending = 0
+                    bucket.inflight += flushed
+                    bucket.syncing = True
+                    batch.append((key, bucket, flushed))
+        if not batch:
+            return
+
+        try:
+            pipe = self.remote.get_connection().pipeline(transaction=False)
+            for key, bucket, flushed in batch:
+                prefixed = self.remote.prefixed_key(key)
+                if flushed:
+                    self.remote.lua_incr_expire([prefixed], [bucket.expiry, flushed], client=pipe)
+                else:
+                    pipe.get(prefixed)
+                pipe.pttl(prefixed)
+            results = pipe.execute()
+        except self.remote.base_exceptions as e:
+            with self._lock:
+                for key, bucket, flushed in batch:
+                    # Back to pending, to be sent by the next sync that reaches Redis
+                    bucket.inflight -= flushed
+                    bucket.pending += flushed
+                    bucket.syncing = False
+            self._remote_failed(e)
+            return
+        self._remote_ok()
+
+        now = time.time()
+        with self._lock:
+            for i, (key, bucket, flushed) in enumerate(batch):
+                total, ttl_ms = results[2 * i], results[2 * i + 1]
+                bucket.inflight -= flushed
+                bucket.base = int(total or 0)
+                bucket.syncing = False
+                if ttl_ms and ttl_ms > 0:
+                    # Follow the Redis window so every worker resets together
+                    bucket.expires_at = now + ttl_ms / 1000
+            # Drop windows that are over and fully reported
+            for key in [
+                k for k, b in self._buckets.items()
+                if b.expires_at <= now and not b.pending and not b.syncing
+            ]:
+                del self._buckets[key]
+
+    def incr(self, key, expiry, amount=1):
+        if self._is_strict(key) and self._remote_up():
+            try:
+                return self.remote.incr(key, expiry, amount)
+            except self.remote.base_exceptions as e:
+                self._remote_failed(e)
+
+        self._ensure_syncer()
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket.expires_at <= now:
+                bucket = self._buckets[key] = _Bucket(now + expiry, expiry, self._budget(key))
+            bucket.pending += amount
+            must_sync = bucket.pending >= bucket.budget and not bucket.syncing
+
+        if must_sync:
+            self.sync(keys={key})
+        with self._lock:
+            return bucket.count()
+
+    def get(self, key):
+        if self._is_strict(key) and self._remote_up():
+            try:
+                return self.remote.get(key)
+            except self.remote.base_exceptions as e:
+                self._remote_failed(e)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket.expires_at <= time.time():
+                return 0
+            return bucket.count()
+
+    def get_expiry(self, key):
+        if self._is_strict(key) and self._remote_up():
+            try:
+                return self.remote.get_expiry(key)
+            except self.remote.base_exceptions as e:
+                self._remote_failed(e)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return bucket.expires_at if bucket else time.time()
+
+    def check(self):
+        try:
+            return self.remote.check()
+        except self.remote.base_exceptions:
+            return False
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+        try:
+            return self.remote.reset()
+        except self.remote.base_exceptions as e:
+            self._remote_failed(e)
+            return None
+
+    def clear(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+        try:
+            self.remote.clear(key)
+        except self.remote.base_exceptions as e:
+            self._remote_failed(e)
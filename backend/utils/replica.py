@@ -0,0 +1,50 @@
+from functools import wraps
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+import sqlalchemy as sa
+
+REPLICA_BIND = "replica"  # key in SQLALCHEMY_BINDS, set when DATABASE_REPLICA_URL is
+
+
+class RoutingSession(Session):
+    """
+    Sends SELECTs to the replica bind inside @use_replica routes; everything else
+    (flushes, INSERT/UPDATE/DELETE, raw SQL) goes to the primary. Once a request
+    has written, its later reads also go to the primary so it reads its own writes.
+    Without a replica bind this behaves exactly like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        engines = self._db.engines
+        if bind is not None or REPLICA_BIND not in engines or engine is not engines.get(None):
+            return engine
+
+        if self._flushing or isinstance(clause, sa.UpdateBase):
+            self.info["wrote_primary"] = True
+            return engine
+        if (
+            has_request_context()
+            and g.get("use_replica")
+            and not self.info.get("wrote_primary")
+            and getattr(clause, "is_select", False)
+        ):
+            return engines[REPLICA_BIND]
+        return engine
+
+
+def use_replica(fn):
+    """
+    Serve this route's read queries from the read replica, if one is configured.
+    Only for read-only analytics; the data can lag the primary by replication delay.
+    Usage: @use_replica, below @jwt_required/@role_required
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        # session.info (and "wrote_primary") goes away with the session at request teardown
+        g.use_replica = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            g.pop("use_replica", None)
+    return wrapper
@@ -0,0 +1,210 @@
+import os
+import json
+import uuid
+import fcntl
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.storage import upload_root, write_blob, reference_blob, file_extension
+from utils.images import queue_after_commit
+from app.extensions import db
+
+CHUNK_SIZE = 64 * 1024
+HEADER_SIZE = 262  # bytes filetype needs to sniff the MIME type
+
+
+class UploadError(ValueError):
+    """Raised for unknown, foreign, incomplete or invalid resumable uploads."""
+
+
+class OffsetMismatch(UploadError):
+    """The client's Upload-Offset does not match what is on disk."""
+
+
+class UploadLocked(UploadError):
+    """Another request is currently writing to the upload."""
+
+
+def incoming_dir():
+    path = os.path.join(upload_root(), ".incoming")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _paths(upload_id):
+    # uuid4 hex only, so ids can never point outside the incoming folder
+    try:
+        upload_id = uuid.UUID(hex=upload_id).hex
+    except (TypeError, ValueError):
+        raise UploadError("Unknown upload id")
+    base = os.path.join(incoming_dir(), upload_id)
+    return f"{base}.json", f"{base}.part"
+
+
+def _write_meta(meta_path, meta):
+    tmp = f"{meta_path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def get_upload(upload_id, user_id):
+    """
+    Metadata of an upload owned by `user_id`, with its current offset.
+
+    Raises:
+        UploadError: the upload does not exist or belongs to someone else.
+    """
+    meta_path, part_path = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise UploadError("Unknown upload id")
+
+    if meta["user_id"] != str(user_id):
+        raise UploadError("Unknown upload id")
+
+    if not meta.get("completed"):
+        meta["offset"] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    return meta
+
+
+def create_upload(user_id, filename, length):
+    """Starts an upload of `length` bytes and returns its id."""
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_id)
+    open(part_path, "wb").close()
+    _write_meta(meta_path, {
+        "user_id": str(user_id),
+        "filename": filename,
+        "length": length,
+        "created_at": datetime.utcnow().isoformat(),
+        "completed": False,
+    })
+    return upload_id
+
+
+def append_chunk(upload_id, user_id, offset, stream):
+    """
+    Appends the request body to the upload if `offset` matches the bytes already
+    received, and returns the new offset. Bytes beyond the declared length are refused.
+    """
+    meta = get_upload(upload_id, user_id)
+    if meta.get("completed"):
+        raise UploadError("Upload is already finalized")
+
+    _, part_path = _paths(upload_id)
+    with open(part_path, "ab") as part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadLocked("Upload is being written by another request")
+
+        current = part.seek(0, os.SEEK_END)
+        if offset != current:
+            raise OffsetMismatch(f"Offset mismatch: upload is at {current}")
+
+        remaining = meta["length"] - current
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if len(chunk) > remaining:
+                raise UploadError("Chunk exceeds the declared upload length")
+            part.write(chunk)
+            remaining -= len(chunk)
+        part.flush()
+        return part.tell()
+
+
+def read_header(upload_id):
+    _, part_path = _paths(upload_id)
+    with open(part_path, "rb") as f:
+        return f.read(HEADER_SIZE)
+
+
+def finalize_upload(upload_id, user_id):
+    """
+    Moves a fully received upload into the content-addressed store. The blob is not
+    referenced until a record claims it with claim_upload.
+    """
+    meta = get_upload(upload_id, user_id)
+    if meta.get("completed"):
+        return meta
+    if meta["offset"] != meta["length"]:
+        raise UploadError(f"Upload incomplete: {meta['offset']} of {meta['length']} bytes received")
+
+    meta_path, part_path = _paths(upload_id)
+    with open(part_path, "rb") as part:
+        digest, size, key, _ = write_blob(part, file_extension(meta["filename"]), upload_root())
+    os.remove(part_path)
+
+    meta.update(completed=True, digest=digest, size=size, key=key)
+    meta.pop("offset", None)
+    _write_meta(meta_path, meta)
+    return meta
+
+
+def discard_upload(upload_id, user_id):
+    get_upload(upload_id, user_id)
+    for path in _paths(upload_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def claim_upload(upload_id, user_id):
+    """
+    Adds a reference to a finalized upload in the current session and returns the
+    stored path to save on the model. The upload id can only be claimed once: its
+    metadata is set aside now, deleted when the session commits and put back if
+    it rolls back, so a failed request can claim it again.
+    """
+    meta = get_upload(upload_id, user_id)
+    if not meta.get("completed"):
+        raise UploadError("Upload has not been finalized")
+
+    meta_path, _ = _paths(upload_id)
+    claimed_path = f"{meta_path}.claimed"
+    try:
+        # Atomic, so of two requests claiming the same id only one gets here
+        os.rename(meta_path, claimed_path)
+    except FileNotFoundError:
+        raise UploadError("Unknown upload id")
+
+    try:
+        path = reference_blob(meta["digest"], meta["size"], meta["key"], created=False)
+    except Exception:
+        os.rename(claimed_path, meta_path)
+        raise
+    db.session.info.setdefault("claimed_uploads", {})[claimed_path] = meta_path
+    # finalize_upload wrote the blob without a session; render variants once it is claimed
+    queue_after_commit(db.session, meta["key"])
+    return path
+
+
+@event.listens_for(Session, "after_commit")
+def _remove_claimed_uploads(session):
+    for claimed_path in session.info.pop("claimed_uploads", {}):
+        try:
+            os.remove(claimed_path)
+        except FileNotFoundError:
+            pass
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _restore_claimed_uploads(session, transaction):
+    # Runs after _remove_claimed_uploads on commit, so anything left was rolled back or abandoned
+    if transaction.parent is not None:
+        return
+    for claimed_path, meta_path in session.info.pop("claimed_uploads", {}).items():
+        try:
+            os.rename(claimed_path, meta_path)
+        except FileNotFoundError:
+            pass
+
+
+def claim_from_form(form, file_key, user_id):
+    """Stored path for a `<file_key>_upload_id` form field, or None when it is absent."""
+    upload_id = form.get(f"{file_key}_upload_id")
+    return claim_upload(upload_id, user_id) if upload_id else None
@@ -0,0 +1,205 @@
+from collections import defaultdict
+from sqlalchemy import func, case
+from app.extensions import db
+from utils.upsert import insert_for
+from app.models import AttendanceDailyRollup, AttendanceRecord, Student, Meal, MealDistribution, MealDailyRollup
+
+UNSPECIFIED_MEAL_TYPE = "unspecified"
+
+
+def _increment(model, key_columns, rows):
+    """
+    Upserts rows into a rollup table, adding every non-key column onto the
+    counters already stored for that key.
+    """
+    table = model.__table__
+    stmt = insert_for(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            column: table.c[column] + stmt.excluded[column]
+            for column in rows[0] if column not in key_columns
+        },
+    )
+    db.session.execute(stmt)
+
+
+def apply_attendance_deltas(deltas):
+    """
+    Applies counter changes to the attendance daily rollup.
+
+    Parameters:
+        deltas (dict): (school_id, grade, date, status) -> change in count.
+            Negative values are used when a record is deleted or its status changes.
+    """
+    rows = [
+        {"school_id": school_id, "grade": grade, "date": date, "status": status, "count": delta}
+        for (school_id, grade, date, status), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    _increment(AttendanceDailyRollup, ["school_id", "grade", "date", "status"], rows)
+
+
+def apply_student_attendance(student_id, sign, grade=None):
+    """
+    Takes a student's attendance out of the attendance rollup (sign=-1) or puts
+    it back (sign=1): on soft delete and restore, so archived students are not
+    counted, and on a grade change, to move their counts to the new grade's
+    buckets. `grade` defaults to the student's current grade.
+    """
+    if grade is None:
+        grade = db.session.query(Student.grade).execution_options(include_deleted=True).filter(
+            Student.id == student_id
+        ).scalar()
+
+    totals = db.session.query(
+        AttendanceRecord.school_id,
+        AttendanceRecord.date,
+        AttendanceRecord.status,
+        func.count(AttendanceRecord.id),
+    ).filter(
+        AttendanceRecord.student_id == student_id
+    ).group_by(AttendanceRecord.school_id, AttendanceRecord.date, AttendanceRecord.status).all()
+
+    apply_attendance_deltas({
+        (school_id, grade, date, status): sign * count
+        for school_id, date, status, count in totals
+    })
+
+
+def rebuild_attendance_rollup(start_date=None, end_date=None):
+    """
+    Recomputes the attendance rollup from attendance_records, optionally limited
+    to a date range. Grades are taken from the students' current grade, as the
+    live updates keep them; soft-deleted students are left out, as
+    apply_student_attendance does. Returns the number of rollup rows written.
+    The caller commits.
+    """
+    delete_query = AttendanceDailyRollup.query
+    if start_date:
+        delete_query = delete_query.filter(AttendanceDailyRollup.date >= start_date)
+    if end_date:
+        delete_query = delete_query.filter(AttendanceDailyRollup.date <= end_date)
+    delete_query.delete(synchronize_session=False)
+
+    source = db.session.query(
+        AttendanceRecord.school_id,
+        Student.grade,
+        AttendanceRecord.date,
+        AttendanceRecord.status,
+        func.count(AttendanceRecord.id),
+    ).join(Student, Student.id == AttendanceRecord.student_id).filter(
+        # Spelled out: the soft-delete criteria don't reach a Core INSERT ... SELECT
+        Student.deleted == False
+    )
+    if start_date:
+        source = source.filter(AttendanceRecord.date >= start_date)
+    if end_date:
+        source = source.filter(AttendanceRecord.date <= end_date)
+    source = source.group_by(
+        AttendanceRecord.school_id, Student.grade, AttendanceRecord.date, AttendanceRecord.status
+    )
+
+    result = db.session.execute(
+        AttendanceDailyRollup.__table__.insert().from_select(
+            ["school_id", "grade", "date", "status", "count"], source.statement
+        )
+    )
+    return result.rowcount
+
+
+def add_meal_distributions(distributions, meal_type):
+    """
+    Adds newly recorded distributions of one meal to the meal daily rollup.
+
+    Parameters:
+        distributions (list[dict]): each with school_id, date, quantity and is_fruit.
+        meal_type (str|None): Meal.type of the meal that was handed out.
+    """
+    meal_type = meal_type or UNSPECIFIED_MEAL_TYPE
+    totals = defaultdict(lambda: {"count": 0, "quantity": 0, "fruit_count": 0})
+    for d in distributions:
+        bucket = totals[(d["school_id"], d["date"])]
+        bucket["count"] += 1
+        bucket["quantity"] += d.get("quantity") or 0
+        bucket["fruit_count"] += 1 if d.get("is_fruit") else 0
+
+    rows = [
+        {"school_id": school_id, "date": date, "meal_type": meal_type, **counters}
+        for (school_id, date), counters in totals.items()
+    ]
+    if rows:
+        _increment(MealDailyRollup, ["school_id", "date", "meal_type"], rows)
+
+
+def apply_student_meals(student_id, sign):
+    """
+    Takes a student's distributions out of the meal rollup (sign=-1, on soft
+    delete) or puts them back (sign=1, on restore), so the rollup keeps
+    matching the mealstats queries, which skip archived students.
+    """
+    meal_type = func.coalesce(Meal.type, UNSPECIFIED_MEAL_TYPE)
+    totals = db.session.query(
+        MealDistribution.school_id,
+        MealDistribution.date,
+        meal_type,
+        func.count(MealDistribution.id),
+        func.coalesce(func.sum(MealDistribution.quantity), 0),
+        func.sum(case((MealDistribution.is_fruit == True, 1), else_=0)),
+    ).join(Meal, Meal.id == MealDistribution.meal_id).filter(
+        MealDistribution.student_id == student_id
+    ).group_by(MealDistribution.school_id, MealDistribution.date, meal_type).all()
+
+    rows = [
+        {
+            "school_id": school_id, "date": date, "meal_type": meal_type,
+            "count": sign * count, "quantity": sign * quantity, "fruit_count": sign * fruit_count,
+        }
+        for school_id, date, meal_type, count, quantity, fruit_count in totals
+    ]
+    if rows:
+        _increment(MealDailyRollup, ["school_id", "date", "meal_type"], rows)
+
+
+def rebuild_meal_rollup(start_date=None, end_date=None):
+    """
+    Recomputes the meal rollup from meal_distributions, optionally limited to a date range.
+    Distributions of soft-deleted students are left out, as apply_student_meals does.
+    Returns the number of rollup rows written. The caller commits.
+    """
+    delete_query = MealDailyRollup.query
+    if start_date:
+        delete_query = delete_query.filter(MealDailyRollup.date >= start_date)
+    if end_date:
+        delete_query = delete_query.filter(MealDailyRollup.date <= end_date)
+    delete_query.delete(synchronize_session=False)
+
+    meal_type = func.coalesce(Meal.type, UNSPECIFIED_MEAL_TYPE)
+    source = db.session.query(
+        MealDistribution.school_id,
+        MealDistribution.date,
+        meal_type,
+        func.count(MealDistribution.id),
+        func.coalesce(func.sum(MealDistribution.quantity), 0),
+        func.sum(case((MealDistribution.is_fruit == True, 1), else_=0)),
+    ).join(Meal, Meal.id == MealDistribution.meal_id).join(
+        Student, Student.id == MealDistribution.student_id
+    ).filter(
+        # Spelled out: the soft-delete criteria don't reach a Core INSERT ... SELECT
+        Student.deleted == False
+    )
+    if start_date:
+        source = source.filter(MealDistribution.date >= start_date)
+    if end_date:
+        source = source.filter(MealDistribution.date <= end_date)
+    source = source.group_by(MealDistribution.school_id, MealDistribution.date, meal_type)
+
+    result = db.session.execute(
+        MealDailyRollup.__table__.insert().from_select(
+            ["school_id", "date", "meal_type", "count", "quantity", "fruit_count"], source.statement
+        )
+    )
+    return result.rowcount
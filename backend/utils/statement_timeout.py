@@ -0,0 +1,47 @@
+from functools import wraps
+from flask import g, jsonify, has_request_context
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.extensions import db
+
+QUERY_CANCELED = "57014"  # Postgres SQLSTATE when statement_timeout fires
+
+
+def _apply(connection, ms):
+    if connection.dialect.name == "postgresql":
+        # LOCAL: ends with the transaction, so the pooled connection goes back clean
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
+
+
+@event.listens_for(Session, "after_begin")
+def _timeout_new_transaction(session, transaction, connection):
+    if has_request_context() and g.get("statement_timeout_ms"):
+        _apply(connection, g.statement_timeout_ms)
+
+
+def statement_timeout(ms):
+    """
+    Caps every statement the route runs at `ms` milliseconds (Postgres only), in
+    place of the DB_STATEMENT_TIMEOUT_MS default. A cancelled query answers 503
+    instead of holding a worker and a pooled connection.
+    Usage: @statement_timeout(5000), below @jwt_required/@role_required
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            g.statement_timeout_ms = ms
+            # The auth decorators may already have opened this request's transaction
+            if db.session().in_transaction():
+                _apply(db.session.connection(), ms)
+            try:
+                return fn(*args, **kwargs)
+            except OperationalError as e:
+                if getattr(e.orig, "pgcode", None) != QUERY_CANCELED:
+                    raise
+                db.session.rollback()
+                return jsonify({"error": "The query took too long. Try a narrower date range or filter."}), 503
+            finally:
+                g.pop("statement_timeout_ms", None)
+        return wrapper
+    return decorator
@@ -0,0 +1,247 @@
+import os
+import hashlib
+import tempfile
+from io import BytesIO
+from datetime import datetime
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, union
+from werkzeug.utils import secure_filename
+from app.extensions import db
+from app.models import (
+    StoredFile, Student, Worker, MealDistribution, TrainingRecord, AcademicSession, PESession
+)
+from utils.upsert import insert_for
+from utils.images import queue_after_commit
+
+CHUNK_SIZE = 64 * 1024
+EXTENSION_ALIASES = {"jpeg": "jpg"}
+
+_executor = None
+
+# Every column holding a stored path: (column, owning school column, join from the column's table)
+FILE_COLUMNS = [
+    (Student.photo, Student.school_id, None),
+    (Student.parent_permission_pdf, Student.school_id, None),
+    (Worker.photo, Worker.school_id, None),
+    (Worker.cv_pdf, Worker.school_id, None),
+    (Worker.id_copy_pdf, Worker.school_id, None),
+    (Worker.clearance_pdf, Worker.school_id, None),
+    (Worker.child_protection_pdf, Worker.school_id, None),
+    (MealDistribution.photo, MealDistribution.school_id, None),
+    (TrainingRecord.photo, Worker.school_id, TrainingRecord.worker),
+    (AcademicSession.photo, Student.school_id, AcademicSession.student),
+    (PESession.photo, Student.school_id, PESession.student),
+]
+
+
+def upload_root():
+    return current_app.config.get('UPLOAD_FOLDER', 'static/uploads')
+
+
+def file_extension(filename):
+    filename = secure_filename(filename or "")
+    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else "bin"
+    return EXTENSION_ALIASES.get(ext, ext)
+
+
+def blob_key(digest, ext):
+    """Hash-sharded location of a blob relative to the upload root: ab/cd/<digest>.<ext>"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def write_blob(stream, ext, root):
+    """
+    Streams `stream` to a temp file under `root` while hashing it, then moves it
+    to its content-addressed location. Identical content is only written once.
+    Does no database work, so it is safe to call from worker threads.
+
+    Returns:
+        (str, int, str, bool): sha256 digest, size in bytes, key relative to root,
+        and whether a new blob was created.
+    """
+    tmp_dir = os.path.join(root, ".tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    sha = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+            tmp.write(chunk)
+            size += len(chunk)
+
+    digest = sha.hexdigest()
+    key = blob_key(digest, ext)
+    target = os.path.join(root, key)
+    if os.path.exists(target):
+        os.remove(tmp.name)
+        # Refresh the mtime so the garbage collector's grace period restarts
+        os.utime(target)
+        return digest, size, key, False
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(tmp.name, target)
+    return digest, size, key, True
+
+
+def add_reference(digest, size, key):
+    """Records one more reference to a blob in the current session."""
+    stmt = insert_for(StoredFile).values(
+        sha256=digest, path=key, size=size, ref_count=1, created_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["sha256"],
+        set_={"ref_count": StoredFile.__table__.c.ref_count + 1},
+    )
+    db.session.execute(stmt)
+
+
+def store_upload(file):
+    """
+    Stores an uploaded FileStorage in the content-addressed store.
+    Returns the stored path (as saved on models), or None when no file was sent.
+    """
+    if not file or not file.filename:
+        return None
+
+    return _store(file.stream, file.filename)
+
+
+def store_bytes(data, filename):
+    """Same as store_upload for in-memory content, e.g. files read from a ZIP."""
+    return _store(BytesIO(data), filename)
+
+
+def store_uploads(files, validate=None):
+    """
+    Stores several uploads from one request concurrently on a bounded thread pool
+    (UPLOAD_WORKERS), so the request takes about as long as its largest file.
+
+    Args:
+        files (dict): field name -> FileStorage.
+        validate (callable): optional check run in the worker before writing,
+            e.g. MIME sniffing; files it rejects are skipped.
+
+    Returns:
+        dict: field name -> stored path for every file that was stored.
+    """
+    files = {field: file for field, file in files.items() if file and file.filename}
+    if not files:
+        return {}
+
+    root = upload_root()
+    executor = _get_executor()
+    futures = {
+        field: executor.submit(_validate_and_write, file, validate, root)
+        for field, file in files.items()
+    }
+
+    # Wait for every write before surfacing a failure; blobs left behind by a
+    # failed request are collected by gc-uploads
+    paths, error = {}, None
+    for field, future in futures.items():
+        try:
+            result = future.result()
+        except OSError as e:
+            error = error or e
+            continue
+        if result:
+            paths[field] = reference_blob(*result)
+
+    if error:
+        raise error
+    return paths
+
+
+def _validate_and_write(file, validate, root):
+    # Worker thread: filesystem only, no app context or session
+    if validate and not validate(file):
+        return None
+    return write_blob(file.stream, file_extension(file.filename), root)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get("UPLOAD_WORKERS", 4),
+            thread_name_prefix="upload",
+        )
+    return _executor
+
+
+def _store(stream, filename):
+    root = upload_root()
+    return reference_blob(*write_blob(stream, file_extension(filename), root))
+
+
+def reference_blob(digest, size, key, created):
+    """
+    Adds a reference to a blob written by write_blob and returns its stored path.
+    Blobs are never unlinked here, even if the session rolls back: a concurrent
+    request may have found the same content on disk and be about to reference
+    it. Unreferenced blobs are left for gc-uploads and its grace period.
+    """
+    add_reference(digest, size, key)
+    if created:
+        queue_after_commit(db.session, key)
+    return stored_path(key)
+
+
+def retain(path, count=1):
+    """
+    Adds `count` references to an already stored path, e.g. when several records
+    share one upload. Paths outside the content-addressed store are ignored.
+    """
+    if not path or count < 1:
+        return
+
+    digest = os.path.basename(path).split('.', 1)[0]
+    StoredFile.query.filter(
+        StoredFile.sha256 == digest
+    ).update({StoredFile.ref_count: StoredFile.ref_count + count}, synchronize_session=False)
+
+
+def release(path):
+    """
+    Drops one reference to a stored path, e.g. when a document is replaced.
+    Blobs are not unlinked here: a concurrent upload of the same content may be
+    reusing the file, so unreferenced blobs are left for garbage collection.
+    Paths outside the content-addressed store are ignored.
+    """
+    if not path:
+        return
+
+    digest = os.path.basename(path).split('.', 1)[0]
+    StoredFile.query.filter(
+        StoredFile.sha256 == digest,
+        StoredFile.ref_count > 0
+    ).update({StoredFile.ref_count: StoredFile.ref_count - 1}, synchronize_session=False)
+
+
+def stored_path(key):
+    """Path as saved on models for a key relative to the upload root."""
+    return os.path.join(upload_root(), key).replace('\\', '/')
+
+
+def owning_school_ids(key):
+    """
+    Schools whose records reference the stored file `key`. Identical uploads share
+    one blob, so a file can belong to several schools. Soft-deleted records count.
+    """
+    path = stored_path(key)
+    selects = []
+    for column, school_column, join in FILE_COLUMNS:
+        stmt = select(school_column).select_from(column.class_)
+        if join is not None:
+            stmt = stmt.join(join)
+        selects.append(stmt.where(column == path))
+
+    rows = db.session.execute(
+        union(*selects), execution_options={"include_deleted": True}
+    ).scalars()
+    return set(rows)
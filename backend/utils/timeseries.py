@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+GRANULARITIES = ("day", "week", "month", "term")
+
+
+def bucket_start(day, granularity, term_starts):
+    """
+    Returns the first day of the bucket that `day` falls in.
+    Weeks start on Monday. Terms run from one configured term start to the next,
+    so school holidays are counted in the term before them.
+    """
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+
+    starts = [date(day.year, month, d) for month, d in term_starts]
+    passed = [s for s in starts if s <= day]
+    if passed:
+        return passed[-1]
+    month, d = term_starts[-1]
+    return date(day.year - 1, month, d)
+
+
+def next_bucket(start, granularity, term_starts):
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+    starts = [date(start.year, month, d) for month, d in term_starts]
+    later = [s for s in starts if s > start]
+    if later:
+        return later[0]
+    month, d = term_starts[0]
+    return date(start.year + 1, month, d)
+
+
+def bucket_starts(start_date, end_date, granularity, term_starts):
+    """Every bucket start from the bucket containing start_date up to end_date."""
+    current = bucket_start(start_date, granularity, term_starts)
+    buckets = []
+    while current <= end_date:
+        buckets.append(current)
+        current = next_bucket(current, granularity, term_starts)
+    return buckets
+
+
+def fill_daily(rows, start_date, end_date, granularity, term_starts):
+    """
+    Folds (date, value) rows into dense buckets, zero-filling the gaps.
+
+    Returns:
+        (list[date], list[number]): bucket starts and their totals.
+    """
+    buckets = bucket_starts(start_date, end_date, granularity, term_starts)
+    totals = dict.fromkeys(buckets, 0)
+    for day, value in rows:
+        key = bucket_start(day, granularity, term_starts)
+        if key in totals:
+            totals[key] += value or 0
+    return buckets, [totals[b] for b in buckets]
+
+
+def term_label(start, term_starts, term_names):
+    """Human label for a term bucket, e.g. '2025 Term 2'."""
+    position = [tuple(t) for t in term_starts].index((start.month, start.day))
+    return f"{start.year} {term_names[position]}"
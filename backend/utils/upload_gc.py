@@ -0,0 +1,278 @@
+import os
+import time
+from sqlalchemy import select, union_all, update, literal, func
+from app.extensions import db
+from app.models import StoredFile
+from utils.storage import FILE_COLUMNS, upload_root, stored_path
+from utils.images import stored_key
+
+SCRATCH_DIRS = {".tmp", ".incoming"}
+IN_CHUNK_SIZE = 500  # values per IN list; file_references repeats it in every one of its SELECTs
+
+
+def _reference_selects(paths=None):
+    """One SELECT per file column: (path, table, row id, column), optionally limited to `paths`."""
+    selects = []
+    for column, _, _ in FILE_COLUMNS:
+        model = column.class_
+        stmt = select(
+            column.label("path"),
+            literal(model.__tablename__).label("table"),
+            model.id.label("row_id"),
+            literal(column.key).label("column"),
+        ).where(column.isnot(None))
+        if paths is not None:
+            stmt = stmt.where(column.in_(paths))
+        selects.append(stmt)
+    return selects
+
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def file_references(paths):
+    """
+    Reference index for a batch of paths: path -> [(table, row id, column), ...].
+    Paths that no record holds are absent from the result. Soft-deleted rows count.
+    Paths are matched exactly as stored.
+    """
+    refs = {}
+    # Chunked to stay under the database's bind parameter limit (32766 on SQLite)
+    for chunk in _chunks(paths):
+        rows = db.session.execute(
+            union_all(*_reference_selects(chunk)), execution_options={"include_deleted": True}
+        )
+        for path, table, row_id, column in rows:
+            refs.setdefault(path, []).append((table, row_id, column))
+    return refs
+
+
+def normalise_path(path, root=None):
+    """
+    A file path as stored on a record or found on disk, relative to UPLOAD_FOLDER
+    (absolute if it lies outside it), so "./static/uploads/x.jpg",
+    "static\\uploads\\x.jpg" and "/srv/app/static/uploads/x.jpg" compare equal.
+    Relative paths are taken from the working directory, as when they were saved.
+    """
+    root = os.path.abspath(root or upload_root())
+    full = os.path.abspath(path.replace('\\', '/'))
+    relative = os.path.relpath(full, root)
+    return full if relative == ".." or relative.startswith("../") else relative
+
+
+def legacy_references(root=None):
+    """
+    Normalised paths and bare file names held by records outside the
+    content-addressed store (those are tracked in stored_files instead).
+    Streamed from the database; only the legacy references are kept in memory.
+    """
+    paths, names = set(), set()
+    stmt = union_all(*[select(column).where(column.isnot(None)) for column, _, _ in FILE_COLUMNS])
+    rows = db.session.execute(
+        stmt, execution_options={"include_deleted": True, "yield_per": IN_CHUNK_SIZE}
+    ).scalars()
+    for value in rows:
+        if stored_key(value):
+            continue
+        if '/' in value.replace('\\', '/'):
+            paths.add(normalise_path(value, root))
+        else:
+            names.add(value)
+    return paths, names
+
+
+def rebuild_reference_counts():
+    """
+    Recomputes stored_files.ref_count from the file columns, fixing drift from
+    records that were hard-deleted (e.g. cascades) without releasing their files.
+    References are counted by digest, since the same content uploaded with
+    different extensions is one row but several keys (ab/cd/<digest>.<ext>).
+    Runs as two set-based statements. The caller commits.
+    """
+    prefix = stored_path("")
+    refs = union_all(*_reference_selects()).subquery()
+    # Skip the "ab/cd/" shard directories after the prefix (substr is 1-based)
+    digest = func.substr(refs.c.path, len(prefix) + 7, 64).label("sha256")
+    counts = (
+        select(digest, func.count().label("n"))
+        .where(refs.c.path.startswith(prefix, autoescape=True))
+        .group_by(digest)
+        .subquery()
+    )
+
+    db.session.execute(update(StoredFile).values(ref_count=0))
+    result = db.session.execute(
+        update(StoredFile)
+        .where(StoredFile.sha256 == counts.c.sha256)
+        .values(ref_count=counts.c.n),
+        execution_options={"include_deleted": True},
+    )
+    return result.rowcount
+
+
+def _scan(directory, skip=()):
+    """Streams regular files under `directory` without listing whole trees up front."""
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _digest(name):
+    """sha256 of a content-addressed file or one of its derivatives, else None."""
+    digest = name.split('.', 1)[0]
+    if len(digest) == 64 and all(c in "0123456789abcdef" for c in digest):
+        return digest
+    return None
+
+
+class GCReport:
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.bytes = 0
+        self.rows = 0
+
+    def add(self, entry):
+        self.deleted += 1
+        self.bytes += entry.stat().st_size
+
+
+def collect_garbage(grace_hours=24, dry_run=True, batch_size=1000, extra_dirs=(), on_delete=None):
+    """
+    Deletes upload files no record references that are older than the grace period.
+
+    Content-addressed blobs (and their derivatives) are checked against
+    stored_files in batches; zero-reference rows are removed with the blob.
+    Other files (legacy per-folder uploads, and anything under `extra_dirs`)
+    are checked against the legacy references on the file columns, with both
+    sides normalised by normalise_path. Abandoned resumable uploads and temp
+    files are cleaned up too. Apart from those legacy references, memory use
+    is bounded by `batch_size`.
+
+    Args:
+        on_delete: called with (path, size) for every file deleted (or that
+            would be deleted on a dry run), e.g. to print a report.
+    """
+    root = upload_root()
+    cutoff = time.time() - grace_hours * 3600
+    report = GCReport()
+    legacy = []  # loaded with the first batch that needs it
+
+    def expired(entry):
+        return entry.stat().st_mtime < cutoff
+
+    def referenced(entry):
+        if not legacy:
+            legacy.append(legacy_references(root))
+        paths, names = legacy[0]
+        return normalise_path(entry.path, root) in paths or entry.name in names
+
+    def remove(entry):
+        if on_delete:
+            on_delete(entry.path, entry.stat().st_size)
+        report.add(entry)
+        if not dry_run:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    # Upload tree, skipping in-flight scratch space
+    for batch in _batches(_scan(root, skip=SCRATCH_DIRS), batch_size):
+        report.scanned += len(batch)
+        stored, other = {}, []
+        for entry in batch:
+            digest = _digest(entry.name)
+            if digest:
+                stored.setdefault(digest, []).append(entry)
+            else:
+                other.append(entry)
+
+        _collect_stored(stored, expired, remove, report, dry_run)
+        _collect_other(other, expired, referenced, remove)
+        if not dry_run:
+            db.session.commit()
+
+    for directory in extra_dirs:
+        for batch in _batches(_scan(directory), batch_size):
+            report.scanned += len(batch)
+            _collect_other(batch, expired, referenced, remove)
+
+    # Partial resumable uploads and interrupted writes
+    for scratch in SCRATCH_DIRS:
+        for entry in _scan(os.path.join(root, scratch)):
+            report.scanned += 1
+            if expired(entry):
+                remove(entry)
+
+    return report
+
+
+def _collect_stored(stored, expired, remove, report, dry_run):
+    referenced = set()
+    for chunk in _chunks(stored):
+        referenced.update(db.session.execute(
+            select(StoredFile.sha256).where(
+                StoredFile.sha256.in_(chunk),
+                StoredFile.ref_count > 0,
+            )
+        ).scalars())
+    candidates = [
+        digest for digest, entries in stored.items()
+        if digest not in referenced and all(expired(e) for e in entries)
+    ]
+    if not candidates:
+        return
+
+    if not dry_run:
+        # Delete the rows first; anything referenced again in the meantime keeps its row
+        revived = set()
+        for chunk in _chunks(candidates):
+            result = db.session.execute(
+                StoredFile.__table__.delete().where(
+                    StoredFile.sha256.in_(chunk),
+                    StoredFile.ref_count == 0,
+                )
+            )
+            report.rows += result.rowcount
+            revived.update(db.session.execute(
+                select(StoredFile.sha256).where(StoredFile.sha256.in_(chunk))
+            ).scalars())
+        candidates = [d for d in candidates if d not in revived]
+
+    for digest in candidates:
+        for entry in stored[digest]:
+            # Re-check: write_blob touches a blob when identical content is re-uploaded
+            if expired(entry):
+                remove(entry)
+
+
+def _collect_other(entries, expired, referenced, remove):
+    """Files outside the content-addressed layout, matched by normalised path or bare name."""
+    for entry in entries:
+        if expired(entry) and not referenced(entry):
+            remove(entry)
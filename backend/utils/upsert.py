@@ -0,0 +1,14 @@
+from app.extensions import db
+
+
+def insert_for(model):
+    """
+    Returns a dialect-specific INSERT for the model's table, which supports
+    on_conflict_do_update() on both Postgres and SQLite.
+    """
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model.__table__)
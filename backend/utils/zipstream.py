@@ -0,0 +1,65 @@
+import io
+import os
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+# Formats that are already compressed; deflating them again costs CPU for no gain
+STORED_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp", "pdf", "zip", "docx", "xlsx"}
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink. ZipFile falls back to data descriptors for it."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return b"".join(chunks)
+
+
+def compress_type_for(path):
+    ext = path.rsplit('.', 1)[-1].lower() if '.' in path else ""
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def stream_zip(entries):
+    """
+    Yields a ZIP archive chunk by chunk while reading the files into it, so memory
+    use does not grow with the archive and the first bytes go out immediately.
+
+    Args:
+        entries: iterable of (arcname, path) pairs. Paths must exist.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for arcname, path in entries:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            zinfo.compress_type = compress_type_for(path)
+            with open(path, "rb") as src, zf.open(zinfo, "w") as dest:
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory
+    yield buffer.drain()
+
+
+def existing(entries):
+    """Drops entries whose file is missing on disk."""
+    return [(arcname, path) for arcname, path in entries if path and os.path.exists(path)]